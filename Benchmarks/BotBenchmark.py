@@ -0,0 +1,101 @@
+"""
+Evaluation benchmark for the bot opponent
+Measures predictions per second and the bot's win rate against a set of
+scripted player strategies.
+
+Usage: python Benchmarks/BotBenchmark.py [rounds]
+"""
+
+import sys
+import os
+import random
+import time
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(_project_root, 'Server'))
+
+from Bot import CHOICES, PredictionEngine
+
+BEATS = {'rock': 'scissors', 'paper': 'rock', 'scissors': 'paper'}
+
+
+def random_player():
+    while True:
+        yield random.choice(CHOICES)
+
+
+def rock_lover():
+    while True:
+        yield 'rock' if random.random() < 0.5 else random.choice(CHOICES)
+
+
+def cycler():
+    while True:
+        for choice in CHOICES:
+            yield choice
+
+
+def repeat_after_win():
+    """Repeat a winning throw, otherwise switch (updated via send())"""
+    choice = random.choice(CHOICES)
+    while True:
+        won = yield choice
+        if not won:
+            choice = random.choice([c for c in CHOICES if c != choice])
+
+
+STRATEGIES = {
+    'random': random_player,
+    'rock_lover': rock_lover,
+    'cycler': cycler,
+    'repeat_after_win': repeat_after_win,
+}
+
+
+def play(strategy, rounds: int):
+    """Play the bot against one strategy, return (wins, losses, draws, seconds)"""
+    engine = PredictionEngine()
+    player = strategy()
+    choice = next(player)
+    wins = losses = draws = 0
+    predict_time = 0.0
+
+    for _ in range(rounds):
+        start = time.perf_counter()
+        bot_choice = engine.choose(1)
+        predict_time += time.perf_counter() - start
+
+        if bot_choice == choice:
+            draws += 1
+            player_won = False
+        elif BEATS[bot_choice] == choice:
+            wins += 1
+            player_won = False
+        else:
+            losses += 1
+            player_won = True
+
+        start = time.perf_counter()
+        engine.observe(1, choice, bot_choice)
+        predict_time += time.perf_counter() - start
+
+        choice = player.send(player_won)
+
+    return wins, losses, draws, predict_time
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    print("=" * 50)
+    print(f"Bot benchmark ({rounds} rounds per strategy)")
+    print("=" * 50)
+    print(f"{'strategy':<18}{'win rate':>10}{'loss rate':>11}{'predictions/s':>16}")
+
+    for name, strategy in STRATEGIES.items():
+        wins, losses, draws, seconds = play(strategy, rounds)
+        print(f"{name:<18}{wins / rounds:>10.1%}{losses / rounds:>11.1%}{rounds / seconds:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
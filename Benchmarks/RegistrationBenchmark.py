@@ -0,0 +1,50 @@
+"""
+Registration benchmark
+Measures GameDatabase.add_user throughput for new users, returning users
+served from the cache, and returning users that miss the cache.
+
+Usage: python Benchmarks/RegistrationBenchmark.py [users]
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(_project_root, 'Server'))
+
+from Database import GameDatabase
+
+
+def register_all(db: GameDatabase, names: list) -> float:
+    """Register every name once and return registrations/sec"""
+    start = time.perf_counter()
+    for name in names:
+        db.add_user(name)
+    return len(names) / (time.perf_counter() - start)
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    names = [f"player{i}" for i in range(users)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, "bench.db")
+
+        results = {
+            'new users': register_all(GameDatabase(db_name), names),
+            # A fresh instance warms its cache from the users table
+            'returning (cache warmed at startup)': register_all(GameDatabase(db_name), names),
+            'returning (no cache, UPSERT)': register_all(GameDatabase(db_name, user_cache_size=0), names),
+        }
+
+    print("=" * 50)
+    print(f"Registration benchmark ({users} users)")
+    print("=" * 50)
+    for name, rate in results.items():
+        print(f"{name:<38}{rate:>12,.0f} registrations/s")
+
+
+if __name__ == "__main__":
+    main()
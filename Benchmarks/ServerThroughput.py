@@ -0,0 +1,95 @@
+"""
+Server throughput benchmark
+Plays rounds between pairs of loopback clients and reports rounds/sec for
+the SQLite and in-memory storage backends, so the cost of disk I/O can be
+separated from network and game logic.
+
+Usage: python Benchmarks/ServerThroughput.py [pairs] [rounds]
+"""
+
+import sys
+import os
+import io
+import random
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(_project_root, 'Server'))
+sys.path.insert(0, os.path.join(_project_root, 'Client'))
+
+from Server import RPSServer
+from Database import GameDatabase, MemoryDatabase
+from RateLimit import AdmissionController
+from RPSConnection import BlockingConnection
+
+CHOICES = ('rock', 'paper', 'scissors')
+
+
+def play(client: BlockingConnection, rounds: int):
+    """Play a number of rounds with random choices"""
+    client.wait_for('game_ready')
+    for _ in range(rounds):
+        client.send({'type': 'choice', 'choice': random.choice(CHOICES)})
+        client.wait_for('result')
+
+
+def run(db, pairs: int, rounds: int) -> float:
+    """Run the benchmark against one backend and return rounds/sec"""
+    # Benchmark clients send as fast as they can, so lift the rate limits
+    unlimited = AdmissionController(connect_rate=1e9, connect_burst=1e9,
+                                    message_rate=1e9, message_burst=1e9)
+    server = RPSServer(port=0, bot_wait=None, db=db, admission=unlimited)
+    server_thread = threading.Thread(target=server.start)
+    server_thread.daemon = True
+    server_thread.start()
+    server.ready.wait()
+
+    # Connect in order so consecutive clients share a room
+    clients = [BlockingConnection(server.port, f"player{i}") for i in range(pairs * 2)]
+    threads = [threading.Thread(target=play, args=(client, rounds)) for client in clients]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    for client in clients:
+        client.close()
+
+    # Let the handler threads finish their disconnect logging
+    deadline = time.monotonic() + 5
+    while server.rooms and time.monotonic() < deadline:
+        time.sleep(0.01)
+    server.shutdown()
+    return pairs * rounds / elapsed
+
+
+def main():
+    pairs = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {
+            'sqlite': GameDatabase(os.path.join(tmp, "bench.db")),
+            'memory': MemoryDatabase(),
+        }
+        results = {}
+        # The server logs every round; keep that out of the measurement
+        with redirect_stdout(io.StringIO()):
+            for name, db in backends.items():
+                results[name] = run(db, pairs, rounds)
+
+    print("=" * 50)
+    print(f"Server throughput ({pairs} pairs x {rounds} rounds)")
+    print("=" * 50)
+    for name, rate in results.items():
+        print(f"{name:<8}{rate:>12,.0f} rounds/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Startup benchmark for the client
+Measures import time and time-to-first-frame in headless and GUI modes.
+Each measurement runs in a fresh interpreter so module caches don't hide
+import cost.
+
+Usage: python Benchmarks/StartupBenchmark.py [runs]
+"""
+
+import sys
+import os
+import json
+import socket
+import statistics
+import subprocess
+import tempfile
+import threading
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_client_dir = os.path.join(_project_root, 'Client')
+
+# Code run in the child interpreter. Writes its timings as JSON to a
+# results file, so nothing the client logs can get mixed in.
+HEADLESS_SCRIPT = """
+import sys, time, json
+start = time.perf_counter()
+sys.path.insert(0, {client_dir!r})
+from RPSConnection import RPSConnection
+imported = time.perf_counter()
+tk_on_import = 'tkinter' in sys.modules
+first = []
+done = __import__('threading').Event()
+def on_message(message):
+    first.append(time.perf_counter())
+    done.set()
+conn = RPSConnection('127.0.0.1', {port}, on_message=on_message)
+conn.connect('bench')
+done.wait(5)
+conn.close()
+with open({results_path!r}, 'w') as f:
+    json.dump({{
+        'import_ms': (imported - start) * 1000,
+        'first_frame_ms': (first[0] - start) * 1000 if first else None,
+        'tkinter_loaded': tk_on_import,
+    }}, f)
+"""
+
+GUI_SCRIPT = """
+import sys, time, json
+start = time.perf_counter()
+sys.path.insert(0, {client_dir!r})
+import RPSClient
+imported = time.perf_counter()
+tk_on_import = 'tkinter' in sys.modules
+client = RPSClient.RPSClient()
+try:
+    client.build_gui()
+    client.root.update()
+    first_frame = (time.perf_counter() - start) * 1000
+    client.root.destroy()
+except Exception as e:
+    first_frame = None
+with open({results_path!r}, 'w') as f:
+    json.dump({{
+        'import_ms': (imported - start) * 1000,
+        'first_frame_ms': first_frame,
+        'tkinter_loaded': tk_on_import,
+    }}, f)
+"""
+
+
+def start_stub_server():
+    """Start a server that answers every register with a registered message"""
+    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server_socket.bind(('127.0.0.1', 0))
+    server_socket.listen()
+
+    def serve():
+        while True:
+            try:
+                client_socket, _ = server_socket.accept()
+            except OSError:
+                return
+            try:
+                client_socket.recv(1024)
+                client_socket.send(json.dumps({
+                    'type': 'registered',
+                    'player_num': 1,
+                    'room_id': 'bench',
+                    'message': 'Welcome'
+                }).encode('utf-8'))
+                client_socket.recv(1024)
+            except OSError:
+                pass
+            finally:
+                client_socket.close()
+
+    thread = threading.Thread(target=serve)
+    thread.daemon = True
+    thread.start()
+    return server_socket
+
+
+def run_child(script: str, **params) -> dict:
+    """Run a timing script in a fresh interpreter and return its result"""
+    with tempfile.TemporaryDirectory() as tmp:
+        results_path = os.path.join(tmp, "results.json")
+        output = subprocess.run(
+            [sys.executable, '-c', script.format(results_path=results_path, **params)],
+            capture_output=True,
+            text=True,
+            timeout=30
+        )
+        if output.returncode != 0 or not os.path.exists(results_path):
+            raise RuntimeError(f"Benchmark child failed:\n{output.stderr}")
+        with open(results_path) as f:
+            return json.load(f)
+
+
+def summarize(name: str, results: list):
+    """Print median timings for one mode"""
+    imports = [r['import_ms'] for r in results]
+    frames = [r['first_frame_ms'] for r in results if r['first_frame_ms'] is not None]
+    print(f"{name}:")
+    print(f"  import:           {statistics.median(imports):8.2f} ms (median of {len(imports)})")
+    if frames:
+        print(f"  time-to-first-frame: {statistics.median(frames):5.2f} ms")
+    else:
+        print("  time-to-first-frame: skipped (no display available)")
+    print(f"  tkinter imported at import time: {results[0]['tkinter_loaded']}")
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    server_socket = start_stub_server()
+    port = server_socket.getsockname()[1]
+
+    try:
+        headless = [
+            run_child(HEADLESS_SCRIPT, client_dir=_client_dir, port=port)
+            for _ in range(runs)
+        ]
+        gui = [
+            run_child(GUI_SCRIPT, client_dir=_client_dir)
+            for _ in range(runs)
+        ]
+    finally:
+        server_socket.close()
+
+    print("=" * 50)
+    print("Client startup benchmark")
+    print("=" * 50)
+    summarize("Headless (RPSConnection)", headless)
+    summarize("GUI (RPSClient)", gui)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import queue
+from typing import List, Optional, Tuple
+
+# Events whose effect is fully replaced by a later event of the same kind
+COLLAPSIBLE = {'status', 'result'}
+
+# Events that set the status line and so hide any earlier status update
+SETS_STATUS = {'status', 'result', 'registered', 'game_ready',
+               'opponent_disconnected', 'connection_lost', 'rejected'}
+
+
+class ClientEventQueue:
+    """Thread-safe queue between the network thread and the GUI
+
+    The network thread calls put() for every server message. The GUI calls
+    drain() once per frame and gets the pending events with redundant
+    updates removed, so a burst of messages costs a single repaint.
+    """
+
+    def __init__(self, max_batch: int = 256):
+        self.max_batch = max_batch
+        self.events = queue.SimpleQueue()
+
+    def put(self, kind: str, payload=None):
+        """Add an event (safe to call from any thread)"""
+        self.events.put((kind, payload))
+
+    def drain(self, dropped: Optional[list] = None) -> List[Tuple[str, object]]:
+        """Take up to max_batch pending events and coalesce them
+
+        Events coalesced away are appended to `dropped` if it is given.
+        """
+        batch = []
+        try:
+            while len(batch) < self.max_batch:
+                batch.append(self.events.get_nowait())
+        except queue.Empty:
+            pass
+        return coalesce(batch, dropped)
+
+
+def coalesce(batch: List[Tuple[str, object]],
+             dropped: Optional[list] = None) -> List[Tuple[str, object]]:
+    """Drop events whose effect is overwritten later in the same batch"""
+    kept = []
+    seen = set()
+    status_overwritten = False
+
+    # Walk backwards so we know what comes later
+    for kind, payload in reversed(batch):
+        if ((kind in COLLAPSIBLE and kind in seen) or
+                (kind == 'status' and status_overwritten)):
+            if dropped is not None:
+                dropped.append((kind, payload))
+            continue
+        seen.add(kind)
+        if kind in SETS_STATUS:
+            status_overwritten = True
+        kept.append((kind, payload))
+
+    kept.reverse()
+    if dropped is not None:
+        dropped.reverse()
+    return kept
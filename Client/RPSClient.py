@@ -1,27 +1,66 @@
-import socket
-import threading
-import json
-import tkinter as tk
-from tkinter import messagebox, simpledialog
+from typing import Optional
+
+from RPSConnection import RPSConnection
+from EventQueue import ClientEventQueue
+from Tracing import Tracer
+
+# tkinter is imported on first GUI use so the client can start headless
+tk = None
+messagebox = None
+simpledialog = None
+
+
+def load_tkinter():
+    """Import tkinter and its dialogs on first use"""
+    global tk, messagebox, simpledialog
+    if tk is None:
+        import tkinter
+        from tkinter import messagebox as _messagebox, simpledialog as _simpledialog
+        tk = tkinter
+        messagebox = _messagebox
+        simpledialog = _simpledialog
+
 
 class RPSClient:
-    def __init__(self, host: str = 'localhost', port: int = 5555):
+    def __init__(self, host: str = 'localhost', port: int = 5555,
+                 tracer: Optional[Tracer] = None):
         self.host = host
         self.port = port
-        self.client_socket = None
+        self.connection = RPSConnection(
+            host,
+            port,
+            on_message=self.handle_server_message,
+            on_disconnect=self.handle_disconnect
+        )
         self.player_name = ""
         self.opponent_name = ""
         self.room_id = ""
         self.game_ready = False
-        
-        # Create GUI
+
+        # Optional per-round latency tracing
+        self.tracer = tracer
+
+        # Filled by the network thread, drained by the GUI once per frame
+        self.events = ClientEventQueue()
+        self.frame_interval_ms = 33
+
+        # GUI is built lazily by build_gui()
+        self.root = None
+
+    def build_gui(self):
+        """Create the main window and widgets if not done yet"""
+        if self.root is not None:
+            return
+
+        load_tkinter()
         self.root = tk.Tk()
         self.root.title("Rock Paper Scissors")
         self.root.geometry("500x600")
         self.root.resizable(False, False)
-        
+
         self.setup_gui()
-        
+        self.root.after(self.frame_interval_ms, self.process_events)
+
     def setup_gui(self):
         """Set up the GUI elements"""
         # Title
@@ -156,44 +195,44 @@ class RPSClient:
             return
         
         try:
-            # Connect to server
-            self.client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.client_socket.connect((self.host, self.port))
-            
-            # Send registration
-            register_msg = {
-                'type': 'register',
-                'name': self.player_name
-            }
-            self.client_socket.send(json.dumps(register_msg).encode('utf-8'))
+            # Connect to server and start listening
+            self.connection.connect(self.player_name)
             
             # Disable connect button
             self.connect_btn.config(state=tk.DISABLED)
             self.status_label.config(text="Connected! Waiting for opponent...")
             
-            # Start listening thread
-            listen_thread = threading.Thread(target=self.listen_to_server)
-            listen_thread.daemon = True
-            listen_thread.start()
-            
         except Exception as e:
             messagebox.showerror("Connection Error", f"Could not connect to server:\n{e}")
             self.connect_btn.config(state=tk.NORMAL)
     
-    def listen_to_server(self):
-        """Listen for messages from the server"""
-        try:
-            while True:
-                data = self.client_socket.recv(4096).decode('utf-8')
-                if not data:
-                    break
-                
-                message = json.loads(data)
-                self.handle_server_message(message)
-                
-        except Exception as e:
-            print(f"Error listening to server: {e}")
-            self.root.after(0, self.connection_lost)
+    def handle_disconnect(self):
+        """Called from the listening thread when the connection fails"""
+        self.events.put('connection_lost')
+
+    def process_events(self):
+        """Apply pending server events to the GUI, then schedule the next frame"""
+        handlers = {
+            'registered': self.update_player_info,
+            'game_ready': self.enable_game,
+            'opponent_disconnected': self.handle_opponent_disconnected,
+            'status': self.update_status,
+            'result': self.display_result,
+            'rejected': self.handle_rejected,
+        }
+        dropped = []
+        for kind, payload in self.events.drain(dropped):
+            if kind == 'connection_lost':
+                self.connection_lost()
+                return
+            handlers[kind](payload)
+
+        # A result coalesced away was superseded by the one just rendered
+        for kind, payload in dropped:
+            if kind == 'result':
+                self.finish_trace(payload)
+
+        self.root.after(self.frame_interval_ms, self.process_events)
     
     def handle_server_message(self, message: dict):
         """Handle different types of messages from server"""
@@ -203,7 +242,7 @@ class RPSClient:
             # Store room_id if provided
             if 'room_id' in message:
                 self.room_id = message['room_id']
-            self.root.after(0, self.update_player_info, message)
+            self.events.put('registered', message)
 
         elif msg_type == 'game_ready':
             self.opponent_name = message['opponent']
@@ -217,17 +256,27 @@ class RPSClient:
                 'opponent_score': message.get('opponent_score', 0),
                 'draws': message.get('draws', 0)
             }
-            self.root.after(0, self.enable_game, initial_scores)
+            self.events.put('game_ready', initial_scores)
             
         elif msg_type == 'opponent_disconnected':
+            # Game state is owned by the network thread so a queued
+            # disconnect can't undo a newer game_ready
             self.game_ready = False
-            self.root.after(0, self.handle_opponent_disconnected, message['message'])
+            self.opponent_name = ""
+            self.events.put('opponent_disconnected', message['message'])
             
-        elif msg_type == 'choice_received':
-            self.root.after(0, self.update_status, message['message'])
+        elif msg_type in ('choice_received', 'rate_limited', 'draining'):
+            self.events.put('status', message['message'])
+            
+        elif msg_type in ('rejected', 'kicked'):
+            # The connection is about to close, so no more choices can be sent
+            self.game_ready = False
+            self.events.put('rejected', message['message'])
             
         elif msg_type == 'result':
-            self.root.after(0, self.display_result, message)
+            if self.tracer:
+                self.tracer.stamp(message.get('trace_id'), 'client_recv')
+            self.events.put('result', message)
     
     def update_player_info(self, message: dict):
         """Update player info labels"""
@@ -258,8 +307,6 @@ class RPSClient:
     
     def handle_opponent_disconnected(self, message: str):
         """Handle when opponent disconnects"""
-        self.game_ready = False
-        self.opponent_name = ""
         self.opponent_label.config(
             text="Waiting for opponent...",
             fg="gray"
@@ -270,10 +317,21 @@ class RPSClient:
         self.paper_btn.config(state=tk.DISABLED)
         self.scissors_btn.config(state=tk.DISABLED)
     
+    def handle_rejected(self, message: str):
+        """Handle the server refusing or dropping the connection"""
+        self.connection.close()
+        self.rock_btn.config(state=tk.DISABLED)
+        self.paper_btn.config(state=tk.DISABLED)
+        self.scissors_btn.config(state=tk.DISABLED)
+        self.status_label.config(text=message, fg="red")
+        self.connect_btn.config(state=tk.NORMAL)
+        messagebox.showerror("Connection Refused", message)
+    
     def make_choice(self, choice: str):
         """Send player's choice to server"""
         if not self.game_ready:
             return
+        trace_id = self.tracer.start() if self.tracer else None
         
         # Disable buttons
         self.rock_btn.config(state=tk.DISABLED)
@@ -281,11 +339,9 @@ class RPSClient:
         self.scissors_btn.config(state=tk.DISABLED)
         
         # Send choice to server
-        choice_msg = {
-            'type': 'choice',
-            'choice': choice
-        }
-        self.client_socket.send(json.dumps(choice_msg).encode('utf-8'))
+        if trace_id:
+            self.tracer.stamp(trace_id, 'client_send')
+        self.connection.send_choice(choice, trace_id)
         
         self.status_label.config(text=f"You chose {choice}. Waiting for opponent...")
     
@@ -321,6 +377,14 @@ class RPSClient:
         self.rock_btn.config(state=tk.NORMAL)
         self.paper_btn.config(state=tk.NORMAL)
         self.scissors_btn.config(state=tk.NORMAL)
+        
+        self.finish_trace(result)
+    
+    def finish_trace(self, result: dict):
+        """Stamp a traced result as rendered and write its trace"""
+        if self.tracer:
+            self.tracer.stamp(result.get('trace_id'), 'client_render')
+            self.tracer.finish(result.get('trace_id'), result.get('trace'))
     
     def connection_lost(self):
         """Handle lost connection"""
@@ -329,11 +393,11 @@ class RPSClient:
     
     def run(self):
         """Run the GUI"""
+        self.build_gui()
         self.root.mainloop()
         
         # Clean up
-        if self.client_socket:
-            self.client_socket.close()
+        self.connection.close()
 
 if __name__ == "__main__":
     import sys
@@ -343,5 +407,10 @@ if __name__ == "__main__":
     if len(sys.argv) > 1:
         port = int(sys.argv[1])
     
-    client = RPSClient(port=port)
+    # Optional second argument: fraction of rounds to trace
+    tracer = None
+    if len(sys.argv) > 2:
+        tracer = Tracer(sample_rate=float(sys.argv[2]))
+    
+    client = RPSClient(port=port, tracer=tracer)
     client.run()
\ No newline at end of file
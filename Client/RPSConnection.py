@@ -0,0 +1,174 @@
+import socket
+import threading
+import json
+from typing import Callable, List, Optional, Tuple
+
+_decoder = json.JSONDecoder()
+
+
+def encode_message(message: dict) -> bytes:
+    """Encode a protocol message for sending"""
+    return json.dumps(message).encode('utf-8')
+
+
+def decode_messages(buffer: str) -> Tuple[List[dict], str]:
+    """Split a receive buffer into complete messages and the unparsed remainder
+
+    The server writes one JSON object per send() without a delimiter, so a
+    single recv() can contain several messages or only part of one.
+    """
+    messages = []
+    index = 0
+    length = len(buffer)
+    while index < length:
+        # Skip whitespace between objects
+        while index < length and buffer[index].isspace():
+            index += 1
+        if index >= length:
+            break
+        try:
+            message, index = _decoder.raw_decode(buffer, index)
+        except json.JSONDecodeError:
+            # Incomplete object, wait for more data
+            break
+        messages.append(message)
+    return messages, buffer[index:]
+
+
+class BlockingConnection:
+    """Minimal synchronous protocol client for scripts, benchmarks and tests"""
+
+    def __init__(self, port: int, name: str, host: str = 'localhost',
+                 timeout: Optional[float] = None):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.buffer = ""
+        self.pending = []
+        self.send({'type': 'register', 'name': name})
+
+    def send(self, message: dict):
+        """Send a message to the server"""
+        self.sock.send(encode_message(message))
+
+    def wait_for(self, msg_type: str) -> dict:
+        """Block until a message of the given type arrives"""
+        while True:
+            while self.pending:
+                message = self.pending.pop(0)
+                if message['type'] == msg_type:
+                    return message
+            data = self.sock.recv(4096).decode('utf-8')
+            if not data:
+                raise ConnectionError(f"Server closed the connection while waiting for {msg_type}")
+            self.pending, self.buffer = decode_messages(self.buffer + data)
+
+    def close(self):
+        self.sock.close()
+
+
+class RPSConnection:
+    """Network and protocol core of the client, usable without a GUI"""
+
+    def __init__(self, host: str = 'localhost', port: int = 5555,
+                 on_message: Optional[Callable[[dict], None]] = None,
+                 on_disconnect: Optional[Callable[[], None]] = None):
+        self.host = host
+        self.port = port
+        self.on_message = on_message
+        self.on_disconnect = on_disconnect
+        self.client_socket = None
+        self.listen_thread = None
+        self.player_name = ""
+        # Set by close() so the listener exits quietly
+        self.closing = False
+
+    def connect(self, player_name: str):
+        """Connect to the server, register and start listening"""
+        self.player_name = player_name
+        self.closing = False
+        self.open_socket(self.host, self.port)
+
+        # Send registration
+        self.send({
+            'type': 'register',
+            'name': player_name
+        })
+
+        # Start listening thread
+        self.listen_thread = threading.Thread(target=self.listen)
+        self.listen_thread.daemon = True
+        self.listen_thread.start()
+
+    def open_socket(self, host: str, port: int):
+        """Open the TCP connection to a server or coordinator"""
+        self.client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.client_socket.connect((host, port))
+
+    def follow_redirect(self, message: dict):
+        """Move to the node a cluster coordinator assigned our room to
+
+        A redirect without a room_id (sent by a node when our opponent
+        left) goes back to the coordinator to be matched again.
+        """
+        self.client_socket.close()
+        self.open_socket(message['host'], message['port'])
+        register_msg = {
+            'type': 'register',
+            'name': self.player_name
+        }
+        if message.get('room_id'):
+            register_msg['room_id'] = message['room_id']
+        self.send(register_msg)
+
+    def send(self, message: dict):
+        """Send a message to the server"""
+        self.client_socket.send(encode_message(message))
+
+    def send_choice(self, choice: str, trace_id: Optional[str] = None):
+        """Send the player's choice to the server"""
+        message = {
+            'type': 'choice',
+            'choice': choice
+        }
+        if trace_id is not None:
+            message['trace_id'] = trace_id
+        self.send(message)
+
+    def listen(self):
+        """Listen for messages from the server"""
+        buffer = ""
+        try:
+            while True:
+                data = self.client_socket.recv(4096).decode('utf-8')
+                if not data:
+                    break
+
+                messages, buffer = decode_messages(buffer + data)
+                for message in messages:
+                    if message['type'] == 'redirect':
+                        self.follow_redirect(message)
+                        buffer = ""
+                        break
+                    if self.on_message:
+                        self.on_message(message)
+
+        except Exception as e:
+            if self.closing:
+                return
+            print(f"Error listening to server: {e}")
+            if self.on_disconnect:
+                self.on_disconnect()
+
+    def close(self):
+        """Close the connection to the server"""
+        self.closing = True
+        if self.client_socket:
+            try:
+                # Wakes the listener's recv() so it can exit
+                self.client_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            try:
+                self.client_socket.close()
+            except OSError:
+                pass
+            self.client_socket = None
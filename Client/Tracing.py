@@ -0,0 +1,119 @@
+"""
+Per-round latency tracing
+A sampled round gets a trace_id that is sent with the choice. The server
+adds its stage timestamps to the result and the client appends the merged
+trace to a JSON-lines file. Running this module prints a per-stage
+breakdown of a trace file.
+
+Usage: python Client/Tracing.py [trace_file]
+"""
+
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from typing import Optional
+
+# Stages in the order they happen, with a label for the time since the previous one
+STAGES = [
+    ('client_click', None),
+    ('client_send', 'client: click -> send'),
+    ('server_recv', 'network: client -> server'),
+    ('server_lock', 'server: room lock wait'),
+    ('round_start', 'server: waiting for opponent'),
+    ('db_record', 'db: record_game'),
+    ('db_score', 'db: get_score'),
+    ('server_send', 'server: build and send result'),
+    ('client_recv', 'network: server -> client'),
+    ('client_render', 'client: queue -> render'),
+]
+
+DEFAULT_TRACE_FILE = "rps_trace.jsonl"
+
+
+class Tracer:
+    def __init__(self, path: str = DEFAULT_TRACE_FILE, sample_rate: float = 0.1):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.traces = {}
+        self.max_open = 100
+        self.lock = threading.Lock()
+
+    def start(self) -> Optional[str]:
+        """Start a trace for this round if it is sampled, return its id"""
+        if random.random() >= self.sample_rate:
+            return None
+        trace_id = uuid.uuid4().hex[:12]
+        with self.lock:
+            # Rounds whose result never came back don't finish; forget them
+            while len(self.traces) >= self.max_open:
+                del self.traces[next(iter(self.traces))]
+            self.traces[trace_id] = {'client_click': time.time()}
+        return trace_id
+
+    def stamp(self, trace_id: Optional[str], stage: str):
+        """Record the time a stage was reached"""
+        if trace_id is None:
+            return
+        with self.lock:
+            trace = self.traces.get(trace_id)
+            if trace is not None:
+                trace[stage] = time.time()
+
+    def finish(self, trace_id: Optional[str], server_stamps: Optional[dict] = None):
+        """Merge the server's timestamps and append the trace to the file"""
+        if trace_id is None:
+            return
+        with self.lock:
+            trace = self.traces.pop(trace_id, None)
+            if trace is None:
+                return
+            trace.update(server_stamps or {})
+            trace['trace_id'] = trace_id
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(trace) + '\n')
+
+
+def percentile(values: list, fraction: float) -> float:
+    """Nearest-rank percentile of a sorted list"""
+    index = min(len(values) - 1, int(fraction * len(values)))
+    return values[index]
+
+
+def analyze(path: str):
+    """Print a per-stage latency breakdown of a trace file"""
+    durations = {label: [] for _, label in STAGES if label}
+    totals = []
+    count = 0
+
+    with open(path) as f:
+        for line in f:
+            trace = json.loads(line)
+            count += 1
+            previous = None
+            for stage, label in STAGES:
+                if stage not in trace:
+                    continue
+                if previous is not None and label:
+                    durations[label].append((trace[stage] - trace[previous]) * 1000)
+                previous = stage
+            if 'client_click' in trace and previous:
+                totals.append((trace[previous] - trace['client_click']) * 1000)
+
+    print("=" * 70)
+    print(f"Round latency breakdown ({count} traces, ms)")
+    print("=" * 70)
+    print(f"{'stage':<34}{'count':>7}{'p50':>9}{'p95':>9}{'max':>9}")
+    for label, values in list(durations.items()) + [('total', totals)]:
+        if not values:
+            continue
+        values.sort()
+        print(f"{label:<34}{len(values):>7}{percentile(values, 0.5):>9.2f}"
+              f"{percentile(values, 0.95):>9.2f}{values[-1]:>9.2f}")
+    print("\nNetwork stages include any clock offset between client and server hosts.")
+
+
+if __name__ == "__main__":
+    analyze(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_TRACE_FILE)
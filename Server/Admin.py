@@ -0,0 +1,211 @@
+"""
+Local admin control socket for RPSServer
+Listens on a Unix socket (only reachable from this host, permissions 0600).
+A client sends one command line and gets one JSON reply.
+
+Commands:
+    rooms                        list rooms and their state
+    connections                  count connections, rooms and waiting players
+    kick <room_id> <player>      disconnect player 1 or 2 of a room
+    drain [timeout]              stop matchmaking, finish rounds, flush, exit
+    profile <seconds> [output]   sample all threads, write collapsed stacks
+    timers [on|off|reset]        show or control per-function timers
+    help                         list commands
+
+Usage: python Server/Admin.py [--socket path] <command> [args...]
+"""
+
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from typing import Optional
+
+DEFAULT_ADMIN_SOCKET = "rps_admin.sock"
+
+
+class AdminServer:
+    def __init__(self, server, path: str = DEFAULT_ADMIN_SOCKET):
+        self.server = server
+        self.path = path
+        self.admin_socket = None
+        self.commands = {
+            'help': self.cmd_help,
+            'rooms': self.cmd_rooms,
+            'connections': self.cmd_connections,
+            'kick': self.cmd_kick,
+            'drain': self.cmd_drain,
+            'profile': self.cmd_profile,
+            'timers': self.cmd_timers,
+        }
+
+    def start(self):
+        """Start listening on the Unix socket in a background thread"""
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.admin_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.admin_socket.bind(self.path)
+        os.chmod(self.path, 0o600)
+        self.admin_socket.listen()
+
+        thread = threading.Thread(target=self.accept_loop)
+        thread.daemon = True
+        thread.start()
+        print(f"Admin socket listening on {self.path}")
+
+    def accept_loop(self):
+        """Accept admin connections until the socket is closed"""
+        admin_socket = self.admin_socket
+        while True:
+            try:
+                conn, _ = admin_socket.accept()
+            except OSError:
+                return
+            thread = threading.Thread(target=self.handle_connection, args=(conn,))
+            thread.daemon = True
+            thread.start()
+
+    def handle_connection(self, conn: socket.socket):
+        """Run one command and send back its reply"""
+        try:
+            with conn:
+                data = b""
+                while not data.endswith(b"\n"):
+                    chunk = conn.recv(1024)
+                    if not chunk:
+                        break
+                    data += chunk
+                reply = self.execute(data.decode('utf-8').strip())
+                conn.sendall((json.dumps(reply) + "\n").encode('utf-8'))
+        except OSError as e:
+            print(f"Admin connection error: {e}")
+
+    def execute(self, line: str) -> dict:
+        """Run a command line and return the reply"""
+        parts = line.split()
+        if not parts:
+            return {'ok': False, 'error': 'Empty command'}
+        handler = self.commands.get(parts[0])
+        if handler is None:
+            return {'ok': False, 'error': f"Unknown command '{parts[0]}', try 'help'"}
+        try:
+            return handler(*parts[1:])
+        except (TypeError, ValueError) as e:
+            return {'ok': False, 'error': f"Bad arguments: {e}"}
+
+    def cmd_help(self) -> dict:
+        """List the available commands"""
+        return {'ok': True, 'commands': sorted(self.commands)}
+
+    def cmd_rooms(self) -> dict:
+        """List every room with its players and round state"""
+        rooms = []
+        for room_id, room in list(self.server.rooms.items()):
+            players = []
+            for player_num, client in enumerate(room.clients):
+                if client is None:
+                    continue
+                players.append({
+                    'player': player_num + 1,
+                    'name': room.player_names.get(player_num),
+                    'user_id': room.player_ids.get(player_num),
+                    'bot': not isinstance(client, socket.socket),
+                    'has_chosen': player_num in room.choices
+                })
+            rooms.append({
+                'room_id': room_id,
+                'game_ready': room.game_ready,
+                'round_in_progress': bool(room.choices),
+                'players': players
+            })
+        return {'ok': True, 'rooms': rooms}
+
+    def cmd_connections(self) -> dict:
+        """Count connections, rooms and players waiting for an opponent"""
+        rooms = list(self.server.rooms.values())
+        return {
+            'ok': True,
+            'connections': self.server.admission.connections,
+            'max_connections': self.server.admission.max_connections,
+            'overloaded': self.server.admission.overloaded,
+            'rooms': len(rooms),
+            'waiting_players': sum(1 for room in rooms if not room.is_full()),
+            'draining': self.server.draining
+        }
+
+    def cmd_kick(self, room_id: str, player: str) -> dict:
+        """Disconnect player 1 or 2 of a room"""
+        if not self.server.kick_player(room_id, int(player) - 1):
+            return {'ok': False, 'error': f"No player {player} in room {room_id}"}
+        return {'ok': True, 'kicked': {'room_id': room_id, 'player': int(player)}}
+
+    def cmd_drain(self, timeout: str = "30") -> dict:
+        """Start a graceful drain in the background"""
+        if self.server.draining:
+            return {'ok': False, 'error': 'Already draining'}
+        thread = threading.Thread(target=self.server.drain, args=(float(timeout),))
+        thread.start()
+        return {'ok': True, 'draining': True, 'timeout': float(timeout)}
+
+    def cmd_profile(self, seconds: str, output: Optional[str] = None) -> dict:
+        """Start a sampling profile that writes collapsed stacks when done"""
+        duration = float(seconds)
+        output = output or f"rps_profile_{int(time.time())}.folded"
+        if not self.server.profiler.start(duration, output):
+            return {'ok': False, 'error': 'A profile is already running'}
+        return {'ok': True, 'output': os.path.abspath(output), 'seconds': duration}
+
+    def cmd_timers(self, action: Optional[str] = None) -> dict:
+        """Show the function timers, optionally switching them on/off or resetting"""
+        timers = self.server.timers
+        if action == 'on':
+            timers.enabled = True
+        elif action == 'off':
+            timers.enabled = False
+        elif action == 'reset':
+            timers.reset()
+        elif action is not None:
+            raise ValueError(f"expected on, off or reset, got '{action}'")
+        return {'ok': True, 'enabled': timers.enabled, 'timers': timers.snapshot()}
+
+    def close(self):
+        """Stop listening and remove the socket file"""
+        if self.admin_socket:
+            try:
+                self.admin_socket.close()
+            except OSError:
+                pass
+            self.admin_socket = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+def send_command(line: str, path: str = DEFAULT_ADMIN_SOCKET) -> dict:
+    """Send a command to a running server and return its reply"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(path)
+        conn.sendall((line + "\n").encode('utf-8'))
+        data = b""
+        while True:
+            chunk = conn.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+    return json.loads(data.decode('utf-8'))
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    path = DEFAULT_ADMIN_SOCKET
+    if len(args) >= 2 and args[0] == '--socket':
+        path = args[1]
+        args = args[2:]
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+
+    reply = send_command(' '.join(args), path)
+    print(json.dumps(reply, indent=2))
+    sys.exit(0 if reply.get('ok') else 1)
@@ -0,0 +1,141 @@
+"""
+Offline analytics job over the games table
+Reads games (live and archived partitions, via the all_games view) in
+id-range chunks and folds them into the summary tables
+created by GameDatabase (choice frequency, transitions, win/loss records).
+Progress is stored with each chunk so the job resumes where it stopped.
+
+Usage: python Server/Analytics.py [db_name] [chunk_size]
+"""
+
+import sqlite3
+import sys
+from collections import Counter
+from typing import Dict, Tuple
+
+OUTCOMES = {
+    # game_status -> (player1 outcome, player2 outcome)
+    'player1_win': ('win', 'loss'),
+    'player2_win': ('loss', 'win'),
+    'draw': ('draw', 'draw'),
+}
+
+
+class AnalyticsJob:
+    def __init__(self, db_name: str = "rps_game.db", chunk_size: int = 10000):
+        self.db_name = db_name
+        self.chunk_size = chunk_size
+
+    def run(self) -> int:
+        """Process all games not yet analysed, return how many were processed"""
+        conn = sqlite3.connect(self.db_name)
+        processed = 0
+        try:
+            last_id = self.get_last_game_id(conn)
+            max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM all_games").fetchone()[0]
+            last_throws = self.load_last_throws(conn)
+
+            while last_id < max_id:
+                end_id = min(last_id + self.chunk_size, max_id)
+                rows = conn.execute("""
+                    SELECT id, player1_id, player2_id, player1_choice,
+                           player2_choice, game_status
+                    FROM all_games WHERE id > ? AND id <= ?
+                    ORDER BY id
+                """, (last_id, end_id)).fetchall()
+
+                # One transaction per chunk so progress and totals stay in step
+                with conn:
+                    self.process_chunk(conn, rows, last_throws)
+                    conn.execute(
+                        "UPDATE analytics_progress SET last_game_id = ? WHERE id = 0",
+                        (end_id,)
+                    )
+
+                processed += len(rows)
+                last_id = end_id
+        finally:
+            conn.close()
+        return processed
+
+    def get_last_game_id(self, conn: sqlite3.Connection) -> int:
+        """Get the id of the last game folded into the summary tables"""
+        row = conn.execute("SELECT last_game_id FROM analytics_progress WHERE id = 0").fetchone()
+        return row[0]
+
+    def load_last_throws(self, conn: sqlite3.Connection) -> Dict[int, Tuple[str, str]]:
+        """Load each player's last (choice, outcome) carried between chunks"""
+        rows = conn.execute("SELECT player_id, choice, outcome FROM analytics_last_throw")
+        return {player_id: (choice, outcome) for player_id, choice, outcome in rows}
+
+    def process_chunk(self, conn: sqlite3.Connection, rows: list,
+                      last_throws: Dict[int, Tuple[str, str]]):
+        """Aggregate one chunk of games and add it to the summary tables"""
+        if not rows:
+            return
+
+        # Flatten games into per-player throw columns, two throws per game
+        _, p1_ids, p2_ids, p1_choices, p2_choices, statuses = zip(*rows)
+        p1_outcomes, p2_outcomes = zip(*(OUTCOMES[status] for status in statuses))
+        players = p1_ids + p2_ids
+        choices = p1_choices + p2_choices
+        outcomes = p1_outcomes + p2_outcomes
+
+        choice_counts = Counter(zip(players, choices))
+        outcome_counts = Counter(zip(players, outcomes))
+
+        # Transitions need the throws in game order
+        transition_counts = Counter()
+        changed = set()
+        for i in range(len(rows)):
+            for player_id, choice, outcome in ((p1_ids[i], p1_choices[i], p1_outcomes[i]),
+                                               (p2_ids[i], p2_choices[i], p2_outcomes[i])):
+                previous = last_throws.get(player_id)
+                if previous is not None:
+                    transition_counts[(player_id, previous[1], previous[0], choice)] += 1
+                last_throws[player_id] = (choice, outcome)
+                changed.add(player_id)
+
+        conn.executemany("""
+            INSERT INTO player_choice_stats (player_id, choice, count)
+            VALUES (?, ?, ?)
+            ON CONFLICT(player_id, choice) DO UPDATE SET count = count + excluded.count
+        """, [(p, c, n) for (p, c), n in choice_counts.items()])
+
+        conn.executemany("""
+            INSERT INTO player_transitions (player_id, prev_outcome, prev_choice,
+                                            next_choice, count)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(player_id, prev_outcome, prev_choice, next_choice)
+            DO UPDATE SET count = count + excluded.count
+        """, [key + (n,) for key, n in transition_counts.items()])
+
+        records = {}
+        for (player_id, outcome), n in outcome_counts.items():
+            record = records.setdefault(player_id, {'win': 0, 'loss': 0, 'draw': 0})
+            record[outcome] = n
+        conn.executemany("""
+            INSERT INTO player_records (player_id, wins, losses, draws)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(player_id) DO UPDATE SET
+                wins = wins + excluded.wins,
+                losses = losses + excluded.losses,
+                draws = draws + excluded.draws
+        """, [(p, r['win'], r['loss'], r['draw']) for p, r in records.items()])
+
+        conn.executemany("""
+            INSERT OR REPLACE INTO analytics_last_throw (player_id, choice, outcome)
+            VALUES (?, ?, ?)
+        """, [(p,) + last_throws[p] for p in changed])
+
+
+if __name__ == "__main__":
+    db_name = sys.argv[1] if len(sys.argv) > 1 else "rps_game.db"
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+
+    # Make sure the summary tables exist
+    from Database import GameDatabase
+    GameDatabase(db_name)
+
+    processed = AnalyticsJob(db_name, chunk_size).run()
+    print(f"Processed {processed} games")
@@ -0,0 +1,145 @@
+import json
+import random
+import threading
+from collections import OrderedDict, deque
+from typing import Iterable, Optional
+
+CHOICES = ('rock', 'paper', 'scissors')
+CHOICE_INDEX = {choice: i for i, choice in enumerate(CHOICES)}
+
+# COUNTER[i] is the index of the choice that beats CHOICES[i]
+COUNTER = (1, 2, 0)
+
+BOT_NAME = "RPS Bot"
+
+
+class PlayerModel:
+    """Frequency and Markov counts over a player's recent throws
+
+    Transitions are counted both by previous throw alone and by previous
+    throw plus its outcome, which catches win-stay/lose-shift players.
+    """
+
+    def __init__(self, history_size: int = 50):
+        self.history = deque(maxlen=history_size)
+        self.frequency = [0, 0, 0]
+        self.transitions = [[0, 0, 0] for _ in range(3)]
+        self.outcome_transitions = [[0, 0, 0] for _ in range(9)]
+
+    def observe(self, choice: str, opponent_choice: Optional[str] = None):
+        """Add a throw, forgetting the oldest one once the window is full"""
+        index = CHOICE_INDEX[choice]
+        state = None
+        if opponent_choice is not None:
+            # 0 = draw, 1 = win, 2 = loss for the player
+            outcome = (index - CHOICE_INDEX[opponent_choice]) % 3
+            state = index * 3 + outcome
+
+        if len(self.history) == self.history.maxlen:
+            oldest, oldest_state = self.history[0]
+            self.frequency[oldest] -= 1
+            if len(self.history) > 1:
+                following = self.history[1][0]
+                self.transitions[oldest][following] -= 1
+                if oldest_state is not None:
+                    self.outcome_transitions[oldest_state][following] -= 1
+
+        if self.history:
+            last, last_state = self.history[-1]
+            self.transitions[last][index] += 1
+            if last_state is not None:
+                self.outcome_transitions[last_state][index] += 1
+        self.frequency[index] += 1
+        self.history.append((index, state))
+
+    def predict(self) -> Optional[int]:
+        """Predict the index of the next throw, or None with no history"""
+        if not self.history:
+            return None
+        last, last_state = self.history[-1]
+        row = None
+        if last_state is not None:
+            row = self.outcome_transitions[last_state]
+        if row is None or sum(row) == 0:
+            row = self.transitions[last]
+        if sum(row) == 0:
+            row = self.frequency
+        best = max(row)
+        return random.choice([i for i in range(3) if row[i] == best])
+
+
+class PredictionEngine:
+    """Per-player models with a bounded number of players kept in memory"""
+
+    def __init__(self, max_players: int = 1000, history_size: int = 50):
+        self.max_players = max_players
+        self.history_size = history_size
+        self.models = OrderedDict()
+        # Shared by every room's handler threads; reentrant because the
+        # public methods go through get_model
+        self.lock = threading.RLock()
+
+    def get_model(self, player_id: int) -> PlayerModel:
+        """Get a player's model, evicting the least recently used if needed"""
+        with self.lock:
+            model = self.models.get(player_id)
+            if model is None:
+                model = PlayerModel(self.history_size)
+                self.models[player_id] = model
+                if len(self.models) > self.max_players:
+                    self.models.popitem(last=False)
+            else:
+                self.models.move_to_end(player_id)
+            return model
+
+    def warm(self, player_id: int, choices: Iterable[str]):
+        """Seed a player's model from past throws, oldest first"""
+        with self.lock:
+            if player_id in self.models:
+                return
+            model = self.get_model(player_id)
+            for choice in choices:
+                model.observe(choice)
+
+    def observe(self, player_id: int, choice: str, opponent_choice: Optional[str] = None):
+        """Record a throw made by a player and, if known, what it faced"""
+        with self.lock:
+            self.get_model(player_id).observe(choice, opponent_choice)
+
+    def choose(self, player_id: int) -> str:
+        """Pick the throw that beats the predicted next throw of a player"""
+        with self.lock:
+            predicted = self.get_model(player_id).predict()
+        if predicted is None:
+            return random.choice(CHOICES)
+        return CHOICES[COUNTER[predicted]]
+
+
+class BotClient:
+    """Stands in for a client socket in a Room
+
+    The server sends it the same messages as a human client; it only
+    listens for results to learn the opponent's throws.
+    """
+
+    def __init__(self, engine: PredictionEngine, opponent_id: int):
+        self.engine = engine
+        self.opponent_id = opponent_id
+
+    def choose(self) -> str:
+        """Pick the bot's throw for the current round"""
+        return self.engine.choose(self.opponent_id)
+
+    def send(self, data: bytes):
+        """Receive a message from the server"""
+        message = json.loads(data.decode('utf-8'))
+        if message['type'] == 'result':
+            self.engine.observe(
+                self.opponent_id,
+                message['opponent_choice'],
+                message['your_choice']
+            )
+
+    def close(self):
+        """Nothing to close for a bot"""
+        pass
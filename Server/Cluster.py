@@ -0,0 +1,269 @@
+"""
+Cluster mode: a coordinator that matches players and routes rooms to nodes
+Server nodes keep a connection open to the coordinator while they serve
+(closing it, e.g. when draining, takes the node out of rotation). Clients
+connect to the coordinator as if it were a server; once paired they are
+sent a redirect to the node that owns their room, chosen by consistent
+hashing of the room id. A player whose opponent leaves mid-game is sent
+back to the coordinator to be matched again.
+
+Nodes on other hosts bind to all interfaces and advertise an address
+clients can reach:
+
+    python Server/Cluster.py 5554 0.0.0.0
+    python Server/Server.py 5555 coordinator.example:5554 0.0.0.0 node1.example
+
+Usage: python Server/Cluster.py [port] [bind_host]
+"""
+
+import bisect
+import hashlib
+import json
+import socket
+import sys
+import threading
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+
+from Protocol import MessageReader
+
+
+def ring_hash(key: str) -> int:
+    """Stable 64-bit hash of a key"""
+    return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+
+class HashRing:
+    """Consistent hashing with virtual nodes
+
+    Adding or removing a node only moves the keys in the ring segments
+    it gains or loses, about 1/N of them.
+    """
+
+    def __init__(self, replicas: int = 100):
+        self.replicas = replicas
+        self.hashes = []
+        self.owners = {}
+
+    def add_node(self, node_id: str):
+        """Place a node's virtual points on the ring"""
+        for i in range(self.replicas):
+            point = ring_hash(f"{node_id}#{i}")
+            if point not in self.owners:
+                bisect.insort(self.hashes, point)
+                self.owners[point] = node_id
+
+    def remove_node(self, node_id: str):
+        """Take a node's virtual points off the ring"""
+        for i in range(self.replicas):
+            point = ring_hash(f"{node_id}#{i}")
+            if self.owners.get(point) == node_id:
+                del self.owners[point]
+                self.hashes.remove(point)
+
+    def get_node(self, key: str) -> Optional[str]:
+        """Get the node owning a key, or None if the ring is empty"""
+        if not self.hashes:
+            return None
+        index = bisect.bisect(self.hashes, ring_hash(key)) % len(self.hashes)
+        return self.owners[self.hashes[index]]
+
+
+class Coordinator:
+    def __init__(self, host: str = 'localhost', port: int = 5554, solo_wait: float = 10.0):
+        self.host = host
+        self.port = port
+        # Seconds a player waits for a match before being sent to a node alone
+        # (where the node's bot can take the other seat)
+        self.solo_wait = solo_wait
+        # Seconds between checks that a waiting player is still connected
+        self.poll_interval = 0.1
+        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.ring = HashRing()
+        self.nodes: Dict[str, Tuple[str, int]] = {}
+        self.waiting = None
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.stopped = threading.Event()
+
+    def start(self):
+        """Accept nodes and players until shut down"""
+        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server_socket.bind((self.host, self.port))
+        self.server_socket.listen()
+        self.port = self.server_socket.getsockname()[1]
+        self.ready.set()
+        print(f"Coordinator started on {self.host}:{self.port}")
+
+        while True:
+            try:
+                conn, address = self.server_socket.accept()
+            except OSError as e:
+                if not self.stopped.is_set():
+                    print(f"Error accepting connection: {e}")
+                break
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            thread = threading.Thread(target=self.handle_connection, args=(conn,))
+            thread.daemon = True
+            thread.start()
+
+    def handle_connection(self, conn: socket.socket):
+        """Dispatch on the first message: a node registering or a player"""
+        reader = MessageReader(conn)
+        try:
+            message = reader.read()
+            if message is None:
+                conn.close()
+                return
+            if message['type'] == 'node_register':
+                self.handle_node(conn, reader, message)
+            elif message['type'] == 'register':
+                self.handle_player(conn, reader, message)
+            else:
+                conn.close()
+        except (ConnectionError, OSError, json.JSONDecodeError, KeyError) as e:
+            print(f"Coordinator: connection error: {e}")
+            conn.close()
+
+    def handle_node(self, conn: socket.socket, reader: MessageReader, message: dict):
+        """Keep a node in the ring for as long as its connection is open"""
+        node_id = message['node_id']
+        with self.lock:
+            self.nodes[node_id] = (message['host'], message['port'])
+            self.ring.add_node(node_id)
+        print(f"Coordinator: node {node_id} joined at {message['host']}:{message['port']}")
+
+        try:
+            while reader.read() is not None:
+                pass
+        except (OSError, json.JSONDecodeError):
+            pass
+        finally:
+            with self.lock:
+                self.nodes.pop(node_id, None)
+                self.ring.remove_node(node_id)
+            conn.close()
+            print(f"Coordinator: node {node_id} left")
+
+    def handle_player(self, conn: socket.socket, reader: MessageReader, message: dict):
+        """Pair a player with the one waiting, or wait to be paired"""
+        player = {'conn': conn, 'reader': reader, 'name': message.get('name'),
+                  'matched': threading.Event(), 'abandoned': False}
+
+        with self.lock:
+            opponent = self.waiting
+            if opponent is not None and opponent['reader'].peer_closed():
+                # Hung up before its own thread noticed; take its place
+                # and leave closing the connection to that thread
+                opponent['abandoned'] = True
+                opponent = None
+            if opponent is not None:
+                self.waiting = None
+            else:
+                self.waiting = player
+
+        if opponent is not None:
+            room_id = str(uuid.uuid4())[:8]
+            self.redirect([opponent, player], room_id)
+            opponent['matched'].set()
+            return
+
+        deadline = time.monotonic() + self.solo_wait
+        while not player['matched'].wait(self.poll_interval):
+            if reader.peer_closed():
+                with self.lock:
+                    if self.waiting is player:
+                        self.waiting = None
+                    elif not player['abandoned']:
+                        # Matched as it hung up; the opponent's thread closes it
+                        return
+                print(f"Coordinator: {player['name']} left while waiting")
+                conn.close()
+                return
+
+            if time.monotonic() >= deadline:
+                with self.lock:
+                    if self.waiting is not player:
+                        # Matched just as the wait ran out
+                        return
+                    self.waiting = None
+                self.redirect([player], str(uuid.uuid4())[:8])
+                return
+
+    def redirect(self, players: list, room_id: str):
+        """Send players to the node that owns a room"""
+        with self.lock:
+            node_id = self.ring.get_node(room_id)
+            address = self.nodes.get(node_id) if node_id else None
+
+        if address is None:
+            reply = {'type': 'rejected', 'message': 'No game servers available, please try again later'}
+        else:
+            reply = {'type': 'redirect', 'host': address[0], 'port': address[1], 'room_id': room_id}
+            print(f"Coordinator: room {room_id} -> node {node_id} "
+                  f"({', '.join(str(p['name']) for p in players)})")
+
+        for player in players:
+            try:
+                player['conn'].send(json.dumps(reply).encode('utf-8'))
+            except OSError as e:
+                print(f"Coordinator: error redirecting {player['name']}: {e}")
+            finally:
+                player['conn'].close()
+
+    def shutdown(self):
+        """Stop accepting connections"""
+        self.stopped.set()
+        try:
+            self.server_socket.close()
+        except OSError:
+            pass
+
+
+class ClusterNode:
+    """Registers a server node with the coordinator and stays connected
+
+    `host` is the advertised address clients are redirected to, not
+    necessarily the one the node's server socket is bound to.
+    """
+
+    def __init__(self, node_id: str, host: str, port: int,
+                 coordinator: Tuple[str, int]):
+        self.node_id = node_id
+        self.host = host
+        self.port = port
+        self.coordinator = coordinator
+        self.conn = None
+
+    def register(self):
+        """Join the coordinator's ring"""
+        self.conn = socket.create_connection(self.coordinator)
+        self.conn.send(json.dumps({
+            'type': 'node_register',
+            'node_id': self.node_id,
+            'host': self.host,
+            'port': self.port
+        }).encode('utf-8'))
+        print(f"Registered node {self.node_id} with coordinator "
+              f"{self.coordinator[0]}:{self.coordinator[1]}")
+
+    def close(self):
+        """Leave the ring so no new rooms are routed here"""
+        if self.conn:
+            try:
+                self.conn.close()
+            except OSError:
+                pass
+            self.conn = None
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 5554
+    host = sys.argv[2] if len(sys.argv) > 2 else 'localhost'
+    coordinator = Coordinator(host=host, port=port)
+    try:
+        coordinator.start()
+    except KeyboardInterrupt:
+        print("\nCoordinator shutdown requested...")
+        coordinator.shutdown()
@@ -1,10 +1,78 @@
 import sqlite3
-from typing import Optional, Tuple
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 
-class GameDatabase:
-    def __init__(self, db_name: str = "rps_game.db"):
+class GameStorage(ABC):
+    """Storage interface used by RPSServer"""
+    
+    # Names players can't register, e.g. the bot's (see reserve_name)
+    reserved_names = frozenset()
+    
+    @abstractmethod
+    def add_user(self, name: str, reserved_ok: bool = False) -> Optional[int]:
+        """Add a new user or get existing user ID, None for a reserved name"""
+    
+    @abstractmethod
+    def record_game(self, player1_id: int, player2_id: int,
+                    player1_choice: str, player2_choice: str,
+                    game_status: str):
+        """Record a game result"""
+    
+    @abstractmethod
+    def get_score(self, player1_id: int, player2_id: int) -> Tuple[int, int, int]:
+        """Get win/loss/draw counts between two players"""
+    
+    @abstractmethod
+    def get_recent_choices(self, user_id: int, limit: int = 50) -> List[str]:
+        """Get a player's most recent throws, oldest first"""
+    
+    @abstractmethod
+    def get_user_name(self, user_id: int) -> Optional[str]:
+        """Get username by ID"""
+    
+    def flush(self):
+        """Write out anything buffered (called before shutdown)"""
+    
+    def reserve_name(self, name: str):
+        """Keep a name for the server's own use"""
+        self.reserved_names = self.reserved_names | {name}
+
+class UserCache:
+    """Bounded, thread-safe name -> user ID cache (least recently used out)"""
+    
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def get(self, name: str) -> Optional[int]:
+        """Get a cached user ID, or None on a miss"""
+        with self.lock:
+            user_id = self.entries.get(name)
+            if user_id is not None:
+                self.entries.move_to_end(name)
+            return user_id
+    
+    def put(self, name: str, user_id: int):
+        """Cache a user ID, evicting the least recently used entry if full"""
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            self.entries[name] = user_id
+            self.entries.move_to_end(name)
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+class GameDatabase(GameStorage):
+    """SQLite storage, one connection per call"""
+    
+    def __init__(self, db_name: str = "rps_game.db", user_cache_size: int = 10000):
         self.db_name = db_name
+        self.user_cache = UserCache(user_cache_size)
         self.init_database()
+        self.warm_user_cache()
     
     def init_database(self):
         """Initialize the database with required tables"""
@@ -34,24 +102,129 @@ class GameDatabase:
             )
         """)
         
+        # Indexes for per-player lookups
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_games_player1
+            ON games (player1_id, player2_id)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_games_player2
+            ON games (player2_id, player1_id)
+        """)
+        
+        # Head-to-head totals of closed monthly partitions (see Partitions.py),
+        # stored once per pair with the lower user ID first
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS head_to_head_rollup (
+                player_low INTEGER NOT NULL,
+                player_high INTEGER NOT NULL,
+                low_wins INTEGER NOT NULL,
+                high_wins INTEGER NOT NULL,
+                draws INTEGER NOT NULL,
+                PRIMARY KEY (player_low, player_high)
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS game_partitions (
+                month TEXT PRIMARY KEY,
+                table_name TEXT,
+                row_count INTEGER NOT NULL
+            )
+        """)
+        
+        # Live games plus archived partitions, rebuilt by Partitions.py
+        cursor.execute("CREATE VIEW IF NOT EXISTS all_games AS SELECT * FROM games")
+        
+        # Summary tables filled by the offline job in Analytics.py
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS analytics_progress (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                last_game_id INTEGER NOT NULL
+            )
+        """)
+        cursor.execute("INSERT OR IGNORE INTO analytics_progress (id, last_game_id) VALUES (0, 0)")
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS player_choice_stats (
+                player_id INTEGER NOT NULL,
+                choice TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (player_id, choice)
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS player_transitions (
+                player_id INTEGER NOT NULL,
+                prev_outcome TEXT NOT NULL,
+                prev_choice TEXT NOT NULL,
+                next_choice TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (player_id, prev_outcome, prev_choice, next_choice)
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS player_records (
+                player_id INTEGER PRIMARY KEY,
+                wins INTEGER NOT NULL,
+                losses INTEGER NOT NULL,
+                draws INTEGER NOT NULL
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS analytics_last_throw (
+                player_id INTEGER PRIMARY KEY,
+                choice TEXT NOT NULL,
+                outcome TEXT NOT NULL
+            )
+        """)
+        
         conn.commit()
         conn.close()
     
-    def add_user(self, name: str) -> Optional[int]:
-        """Add a new user or get existing user ID"""
+    def warm_user_cache(self):
+        """Load the most recently created users into the cache"""
+        if self.user_cache.max_size <= 0:
+            return
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT name, id FROM users ORDER BY id DESC LIMIT ?
+        """, (self.user_cache.max_size,))
+        rows = cursor.fetchall()
+        
+        conn.close()
+        # Oldest first so the newest users end up most recently used
+        for name, user_id in reversed(rows):
+            self.user_cache.put(name, user_id)
+    
+    def add_user(self, name: str, reserved_ok: bool = False) -> Optional[int]:
+        """Add a new user or get existing user ID, None for a reserved name"""
+        if name in self.reserved_names and not reserved_ok:
+            return None
+        user_id = self.user_cache.get(name)
+        if user_id is not None:
+            return user_id
+        
         conn = sqlite3.connect(self.db_name)
         cursor = conn.cursor()
         
-        try:
-            cursor.execute("INSERT INTO users (name) VALUES (?)", (name,))
-            conn.commit()
-            user_id = cursor.lastrowid
-        except sqlite3.IntegrityError:
-            # User already exists, get their ID
-            cursor.execute("SELECT id FROM users WHERE name = ?", (name,))
-            user_id = cursor.fetchone()[0]
+        # Insert or fetch in one statement; the no-op update makes
+        # RETURNING produce the existing row's id
+        cursor.execute("""
+            INSERT INTO users (name) VALUES (?)
+            ON CONFLICT(name) DO UPDATE SET name = excluded.name
+            RETURNING id
+        """, (name,))
+        user_id = cursor.fetchone()[0]
+        conn.commit()
         
         conn.close()
+        self.user_cache.put(name, user_id)
         return user_id
     
     def record_game(self, player1_id: int, player2_id: int, 
@@ -71,39 +244,86 @@ class GameDatabase:
         conn.close()
     
     def get_score(self, player1_id: int, player2_id: int) -> Tuple[int, int, int]:
-        """Get win/loss/draw counts between two players"""
+        """Get win/loss/draw counts between two players
+        
+        Closed months come from head_to_head_rollup, so only the live
+        partition in games is scanned.
+        """
         conn = sqlite3.connect(self.db_name)
         cursor = conn.cursor()
         
-        # Count player1 wins
+        # Read both in one transaction so a compaction committing in
+        # between can't count a month twice or not at all
+        cursor.execute("BEGIN")
+        
+        # Rolled-up totals of closed partitions
+        low, high = min(player1_id, player2_id), max(player1_id, player2_id)
         cursor.execute("""
-            SELECT COUNT(*) FROM games 
-            WHERE ((player1_id = ? AND player2_id = ?) OR 
-                   (player1_id = ? AND player2_id = ?))
-            AND game_status = 'player1_win'
-        """, (player1_id, player2_id, player2_id, player1_id))
-        player1_wins = cursor.fetchone()[0]
+            SELECT low_wins, high_wins, draws FROM head_to_head_rollup
+            WHERE player_low = ? AND player_high = ?
+        """, (low, high))
+        row = cursor.fetchone()
+        if row is None:
+            player1_wins, player2_wins, draws = 0, 0, 0
+        elif player1_id == low:
+            player1_wins, player2_wins, draws = row
+        else:
+            player2_wins, player1_wins, draws = row
         
-        # Count player2 wins
+        # Live partition, counted per player rather than per seat
         cursor.execute("""
-            SELECT COUNT(*) FROM games 
-            WHERE ((player1_id = ? AND player2_id = ?) OR 
-                   (player1_id = ? AND player2_id = ?))
-            AND game_status = 'player2_win'
-        """, (player1_id, player2_id, player2_id, player1_id))
-        player2_wins = cursor.fetchone()[0]
+            SELECT
+                COALESCE(SUM(game_status != 'draw' AND
+                             (game_status = 'player1_win') = (player1_id = ?)), 0),
+                COALESCE(SUM(game_status != 'draw' AND
+                             (game_status = 'player1_win') != (player1_id = ?)), 0),
+                COALESCE(SUM(game_status = 'draw'), 0)
+            FROM games
+            WHERE (player1_id = ? AND player2_id = ?) OR
+                  (player1_id = ? AND player2_id = ?)
+        """, (player1_id, player1_id, player1_id, player2_id, player2_id, player1_id))
+        live_player1_wins, live_player2_wins, live_draws = cursor.fetchone()
         
-        # Count draws
+        conn.commit()
+        conn.close()
+        return (player1_wins + live_player1_wins,
+                player2_wins + live_player2_wins,
+                draws + live_draws)
+    
+    def get_recent_choices(self, user_id: int, limit: int = 50) -> List[str]:
+        """Get a player's most recent throws, oldest first
+        
+        Starts with the live partition and falls back to archived months,
+        newest first, until `limit` throws are found.
+        """
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+        
+        # One transaction so a compaction can't move rows between reads
+        cursor.execute("BEGIN")
         cursor.execute("""
-            SELECT COUNT(*) FROM games 
-            WHERE ((player1_id = ? AND player2_id = ?) OR 
-                   (player1_id = ? AND player2_id = ?))
-            AND game_status = 'draw'
-        """, (player1_id, player2_id, player2_id, player1_id))
-        draws = cursor.fetchone()[0]
+            SELECT table_name FROM game_partitions
+            WHERE table_name IS NOT NULL ORDER BY month DESC
+        """)
+        tables = ['games'] + [row[0] for row in cursor.fetchall()]
+        
+        choices = []
+        for table in tables:
+            if len(choices) >= limit:
+                break
+            cursor.execute(f"""
+                SELECT CASE WHEN player1_id = ? THEN player1_choice ELSE player2_choice END
+                FROM {table}
+                WHERE player1_id = ? OR player2_id = ?
+                ORDER BY id DESC
+                LIMIT ?
+            """, (user_id, user_id, user_id, limit - len(choices)))
+            choices.extend(row[0] for row in cursor.fetchall())
         
+        conn.commit()
         conn.close()
-        return (player1_wins, player2_wins, draws)
+        choices.reverse()
+        return choices
     
     def get_user_name(self, user_id: int) -> Optional[str]:
         """Get username by ID"""
@@ -114,4 +334,116 @@ class GameDatabase:
         result = cursor.fetchone()
         
         conn.close()
-        return result[0] if result else None
\ No newline at end of file
+        return result[0] if result else None
+    
+    def get_choice_frequency(self, player_id: int) -> Dict[str, int]:
+        """Get how often a player threw each choice (from analytics)"""
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT choice, count FROM player_choice_stats WHERE player_id = ?
+        """, (player_id,))
+        result = dict(cursor.fetchall())
+        
+        conn.close()
+        return result
+    
+    def get_transitions(self, player_id: int, after: str = 'loss') -> Dict[str, Dict[str, int]]:
+        """Get what a player threw next after a given outcome (from analytics)
+        
+        Returns {previous_choice: {next_choice: count}}
+        """
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT prev_choice, next_choice, count FROM player_transitions
+            WHERE player_id = ? AND prev_outcome = ?
+        """, (player_id, after))
+        result = {}
+        for prev_choice, next_choice, count in cursor.fetchall():
+            result.setdefault(prev_choice, {})[next_choice] = count
+        
+        conn.close()
+        return result
+    
+    def get_player_record(self, player_id: int) -> Tuple[int, int, int]:
+        """Get a player's overall wins, losses and draws (from analytics)"""
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT wins, losses, draws FROM player_records WHERE player_id = ?
+        """, (player_id,))
+        result = cursor.fetchone()
+        
+        conn.close()
+        return tuple(result) if result else (0, 0, 0)
+    
+    def get_win_rate(self, player_id: int) -> float:
+        """Get a player's win rate over all analysed games"""
+        wins, losses, draws = self.get_player_record(player_id)
+        total = wins + losses + draws
+        return wins / total if total else 0.0
+
+class MemoryDatabase(GameStorage):
+    """In-memory storage for tests and benchmarks, nothing is persisted"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.user_ids = {}
+        self.user_names = {}
+        self.games = []
+        self.choices = {}
+        # (lower id, higher id) -> [lower id wins, higher id wins, draws]
+        self.scores = {}
+    
+    def add_user(self, name: str, reserved_ok: bool = False) -> Optional[int]:
+        """Add a new user or get existing user ID, None for a reserved name"""
+        if name in self.reserved_names and not reserved_ok:
+            return None
+        with self.lock:
+            user_id = self.user_ids.get(name)
+            if user_id is None:
+                user_id = len(self.user_ids) + 1
+                self.user_ids[name] = user_id
+                self.user_names[user_id] = name
+            return user_id
+    
+    def record_game(self, player1_id: int, player2_id: int,
+                    player1_choice: str, player2_choice: str,
+                    game_status: str):
+        """Record a game result"""
+        with self.lock:
+            self.games.append((player1_id, player2_id, player1_choice,
+                               player2_choice, game_status))
+            self.choices.setdefault(player1_id, []).append(player1_choice)
+            self.choices.setdefault(player2_id, []).append(player2_choice)
+            
+            key = (min(player1_id, player2_id), max(player1_id, player2_id))
+            score = self.scores.setdefault(key, [0, 0, 0])
+            if game_status == 'draw':
+                score[2] += 1
+            elif (game_status == 'player1_win') == (player1_id == key[0]):
+                score[0] += 1
+            else:
+                score[1] += 1
+    
+    def get_score(self, player1_id: int, player2_id: int) -> Tuple[int, int, int]:
+        """Get win/loss/draw counts between two players"""
+        with self.lock:
+            key = (min(player1_id, player2_id), max(player1_id, player2_id))
+            low_wins, high_wins, draws = self.scores.get(key, (0, 0, 0))
+        if player1_id == key[0]:
+            return (low_wins, high_wins, draws)
+        return (high_wins, low_wins, draws)
+    
+    def get_recent_choices(self, user_id: int, limit: int = 50) -> List[str]:
+        """Get a player's most recent throws, oldest first"""
+        with self.lock:
+            return self.choices.get(user_id, [])[-limit:] if limit > 0 else []
+    
+    def get_user_name(self, user_id: int) -> Optional[str]:
+        """Get username by ID"""
+        return self.user_names.get(user_id)
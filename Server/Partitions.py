@@ -0,0 +1,206 @@
+"""
+Monthly partitioning of the games table
+The games table holds the live partition. Compaction closes every month
+before the current one: its head-to-head totals are added to
+head_to_head_rollup, its raw rows move to a games_YYYY_MM archive table
+(or are dropped when archiving is off) and are removed from games.
+Retention drops archive tables older than a number of months; the rollups
+are kept, so scores are unaffected. Raw rows are only dropped once the
+analytics job (Analytics.py) has processed them.
+
+Usage: python Server/Partitions.py [db_name] [retention_months]
+"""
+
+import sqlite3
+import sys
+from datetime import datetime, timezone
+from typing import List, Optional
+
+
+def month_index(month: str) -> int:
+    """Turn 'YYYY-MM' into a month count for arithmetic"""
+    year, mon = month.split('-')
+    return int(year) * 12 + int(mon) - 1
+
+
+def partition_table(month: str) -> str:
+    """Archive table name for a 'YYYY-MM' month"""
+    return f"games_{month.replace('-', '_')}"
+
+
+class PartitionManager:
+    def __init__(self, db_name: str = "rps_game.db", retention_months: Optional[int] = 12,
+                 archive: bool = True):
+        self.db_name = db_name
+        # None keeps archived partitions forever
+        self.retention_months = retention_months
+        self.archive = archive
+
+    def run(self, now: Optional[datetime] = None):
+        """Compact closed months, then apply the retention policy"""
+        self.compact(now)
+        self.apply_retention(now)
+
+    def current_month(self, now: Optional[datetime] = None) -> str:
+        """Get the live month as 'YYYY-MM' (timestamps are stored in UTC)"""
+        now = now or datetime.now(timezone.utc)
+        return now.strftime('%Y-%m')
+
+    def compact(self, now: Optional[datetime] = None) -> List[str]:
+        """Close every month before the current one, return the months closed"""
+        live_month = self.current_month(now)
+        conn = sqlite3.connect(self.db_name)
+        try:
+            if self.archive:
+                # Archived rows stay visible to analytics through all_games
+                max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM games").fetchone()[0]
+            else:
+                # Without archiving, rows analytics hasn't seen stay in games
+                max_id = self.analyzed_id(conn)
+            months = [row[0] for row in conn.execute("""
+                SELECT DISTINCT substr(timestamp, 1, 7) FROM games
+                WHERE substr(timestamp, 1, 7) < ? AND id <= ?
+                ORDER BY 1
+            """, (live_month, max_id))]
+
+            for month in months:
+                # Rollup, archive and delete commit together, and get_score
+                # reads the rollup and games in one transaction, so a month
+                # is never counted twice or not at all
+                with conn:
+                    self.close_month(conn, month, max_id)
+
+            if months:
+                self.rebuild_view(conn)
+        finally:
+            conn.close()
+        return months
+
+    def analyzed_id(self, conn: sqlite3.Connection) -> int:
+        """Get the last game id the analytics job has processed"""
+        row = conn.execute("SELECT last_game_id FROM analytics_progress WHERE id = 0").fetchone()
+        return row[0] if row else 0
+
+    def close_month(self, conn: sqlite3.Connection, month: str, max_id: int):
+        """Roll up one month of games up to max_id and move them out of games"""
+        conn.execute("""
+            INSERT INTO head_to_head_rollup (player_low, player_high,
+                                             low_wins, high_wins, draws)
+            SELECT MIN(player1_id, player2_id), MAX(player1_id, player2_id),
+                   SUM(game_status != 'draw' AND
+                       (game_status = 'player1_win') = (player1_id = MIN(player1_id, player2_id))),
+                   SUM(game_status != 'draw' AND
+                       (game_status = 'player1_win') != (player1_id = MIN(player1_id, player2_id))),
+                   SUM(game_status = 'draw')
+            FROM games
+            WHERE substr(timestamp, 1, 7) = ? AND id <= ?
+            GROUP BY 1, 2
+            ON CONFLICT(player_low, player_high) DO UPDATE SET
+                low_wins = low_wins + excluded.low_wins,
+                high_wins = high_wins + excluded.high_wins,
+                draws = draws + excluded.draws
+        """, (month, max_id))
+
+        table = None
+        if self.archive:
+            table = partition_table(month)
+            # Same columns as games, keeping id as the primary key so id
+            # range reads through all_games stay index lookups
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    id INTEGER PRIMARY KEY,
+                    player1_id INTEGER NOT NULL,
+                    player2_id INTEGER NOT NULL,
+                    player1_choice TEXT NOT NULL,
+                    player2_choice TEXT NOT NULL,
+                    game_status TEXT NOT NULL,
+                    timestamp DATETIME
+                )
+            """)
+            conn.execute(f"""
+                CREATE INDEX IF NOT EXISTS idx_{table}_player1
+                ON {table} (player1_id, player2_id)
+            """)
+            conn.execute(f"""
+                CREATE INDEX IF NOT EXISTS idx_{table}_player2
+                ON {table} (player2_id, player1_id)
+            """)
+            conn.execute(f"""
+                INSERT INTO {table} SELECT * FROM games
+                WHERE substr(timestamp, 1, 7) = ? AND id <= ?
+            """, (month, max_id))
+
+        rows = conn.execute("""
+            DELETE FROM games WHERE substr(timestamp, 1, 7) = ? AND id <= ?
+        """, (month, max_id)).rowcount
+
+        conn.execute("""
+            INSERT INTO game_partitions (month, table_name, row_count)
+            VALUES (?, ?, ?)
+            ON CONFLICT(month) DO UPDATE SET
+                table_name = COALESCE(excluded.table_name, table_name),
+                row_count = row_count + excluded.row_count
+        """, (month, table, rows))
+        print(f"Closed partition {month}: {rows} games{' archived to ' + table if table else ' dropped'}")
+
+    def apply_retention(self, now: Optional[datetime] = None) -> List[str]:
+        """Drop archived partitions older than the retention period"""
+        if self.retention_months is None:
+            return []
+
+        cutoff = month_index(self.current_month(now)) - self.retention_months
+        conn = sqlite3.connect(self.db_name)
+        dropped = []
+        try:
+            partitions = conn.execute("""
+                SELECT month, table_name FROM game_partitions WHERE table_name IS NOT NULL
+            """).fetchall()
+
+            analyzed = self.analyzed_id(conn)
+            for month, table in partitions:
+                if month_index(month) >= cutoff:
+                    continue
+                newest = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+                if newest > analyzed:
+                    print(f"Keeping raw games for {month}: analytics has not processed them yet")
+                    continue
+                with conn:
+                    conn.execute(f"DROP TABLE IF EXISTS {table}")
+                    conn.execute("""
+                        UPDATE game_partitions SET table_name = NULL WHERE month = ?
+                    """, (month,))
+                dropped.append(month)
+                print(f"Dropped raw games for {month} (rollup kept)")
+
+            if dropped:
+                self.rebuild_view(conn)
+        finally:
+            conn.close()
+        return dropped
+
+    def rebuild_view(self, conn: sqlite3.Connection):
+        """Point the all_games view at the live table and every archive"""
+        tables = [row[0] for row in conn.execute("""
+            SELECT table_name FROM game_partitions
+            WHERE table_name IS NOT NULL ORDER BY month
+        """)]
+        selects = " UNION ALL ".join(
+            f"SELECT * FROM {table}" for table in tables + ['games']
+        )
+        with conn:
+            conn.execute("DROP VIEW IF EXISTS all_games")
+            conn.execute(f"CREATE VIEW all_games AS {selects}")
+
+
+if __name__ == "__main__":
+    db_name = sys.argv[1] if len(sys.argv) > 1 else "rps_game.db"
+    retention = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+
+    # Make sure the rollup and catalog tables exist
+    from Database import GameDatabase
+    from Analytics import AnalyticsJob
+    GameDatabase(db_name)
+
+    # Bring analytics up to date first so no raw games are held back
+    AnalyticsJob(db_name).run()
+    PartitionManager(db_name, retention).run()
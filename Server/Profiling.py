@@ -0,0 +1,155 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from Database import GameStorage
+
+
+class SamplingProfiler:
+    """Samples the stacks of all threads and writes collapsed stacks
+
+    The output has one "frame;frame;frame count" line per distinct stack,
+    root first, as read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.thread = None
+        self.lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, duration: float, path: str) -> bool:
+        """Profile for `duration` seconds in the background, False if already running"""
+        with self.lock:
+            if self.running:
+                return False
+            self.thread = threading.Thread(target=self.capture, args=(duration, path))
+            self.thread.daemon = True
+            self.thread.start()
+            return True
+
+    def capture(self, duration: float, path: str):
+        """Sample until `duration` has passed, then write the collapsed stacks"""
+        own_id = threading.get_ident()
+        stacks = Counter()
+        samples = 0
+        deadline = time.monotonic() + duration
+
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stacks[self.collapse(frame)] += 1
+            samples += 1
+            time.sleep(self.interval)
+
+        with open(path, 'w') as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        print(f"Profile written to {path} ({samples} samples, {len(stacks)} stacks)")
+
+    def collapse(self, frame) -> str:
+        """Turn a frame into a root-first, semicolon separated stack"""
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        names.reverse()
+        return ';'.join(names)
+
+
+class FunctionTimers:
+    """Call counts and timings for wrapped functions, off until enabled"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        # name -> [calls, total seconds, max seconds]
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    def wrap(self, name: str, func: Callable) -> Callable:
+        """Return func timed under `name` whenever timers are enabled"""
+        def timed(*args, **kwargs):
+            if not self.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start)
+        timed.__name__ = getattr(func, '__name__', name)
+        timed.__doc__ = func.__doc__
+        return timed
+
+    def record(self, name: str, elapsed: float):
+        """Add one call to the stats"""
+        with self.lock:
+            stat = self.stats.setdefault(name, [0, 0.0, 0.0])
+            stat[0] += 1
+            stat[1] += elapsed
+            stat[2] = max(stat[2], elapsed)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Get the current stats in milliseconds"""
+        with self.lock:
+            return {
+                name: {
+                    'calls': calls,
+                    'total_ms': total * 1000,
+                    'mean_ms': total * 1000 / calls,
+                    'max_ms': longest * 1000
+                }
+                for name, (calls, total, longest) in self.stats.items()
+            }
+
+    def reset(self):
+        """Clear all stats"""
+        with self.lock:
+            self.stats.clear()
+
+
+class TimedStorage(GameStorage):
+    """Wraps a GameStorage so each call is timed as db.<method>"""
+
+    def __init__(self, storage: GameStorage, timers: FunctionTimers):
+        self.storage = storage
+        self.timed = {
+            name: timers.wrap(f'db.{name}', getattr(storage, name))
+            for name in ('add_user', 'record_game', 'get_score',
+                         'get_recent_choices', 'get_user_name')
+        }
+
+    def add_user(self, name: str, reserved_ok: bool = False) -> Optional[int]:
+        return self.timed['add_user'](name, reserved_ok)
+
+    def record_game(self, player1_id: int, player2_id: int,
+                    player1_choice: str, player2_choice: str,
+                    game_status: str):
+        return self.timed['record_game'](player1_id, player2_id, player1_choice,
+                                         player2_choice, game_status)
+
+    def get_score(self, player1_id: int, player2_id: int) -> Tuple[int, int, int]:
+        return self.timed['get_score'](player1_id, player2_id)
+
+    def get_recent_choices(self, user_id: int, limit: int = 50) -> List[str]:
+        return self.timed['get_recent_choices'](user_id, limit)
+
+    def get_user_name(self, user_id: int) -> Optional[str]:
+        return self.timed['get_user_name'](user_id)
+
+    def flush(self):
+        self.storage.flush()
+
+    def reserve_name(self, name: str):
+        self.storage.reserve_name(name)
+
+    def __getattr__(self, name: str):
+        # Anything outside the interface goes straight to the storage
+        return getattr(self.storage, name)
@@ -0,0 +1,48 @@
+import json
+import select
+import socket
+from typing import Optional
+
+_decoder = json.JSONDecoder()
+
+
+class MessageReader:
+    """Reads JSON messages from a client socket
+
+    Messages have no delimiter, so one recv() can hold several messages or
+    part of one. Complete messages are returned one at a time.
+    """
+
+    def __init__(self, client_socket: socket.socket, max_buffer: int = 65536):
+        self.client_socket = client_socket
+        self.max_buffer = max_buffer
+        self.buffer = ""
+
+    def read(self) -> Optional[dict]:
+        """Return the next message, or None when the client disconnects"""
+        while True:
+            self.buffer = self.buffer.lstrip()
+            if self.buffer:
+                try:
+                    message, end = _decoder.raw_decode(self.buffer)
+                    self.buffer = self.buffer[end:]
+                    return message
+                except json.JSONDecodeError:
+                    # Incomplete message, unless the buffer is too big to be one
+                    if len(self.buffer) > self.max_buffer:
+                        raise
+
+            data = self.client_socket.recv(1024).decode('utf-8')
+            if not data:
+                return None
+            self.buffer += data
+
+    def peer_closed(self) -> bool:
+        """Check, without blocking or consuming data, whether the client hung up"""
+        readable, _, _ = select.select([self.client_socket], [], [], 0)
+        if not readable:
+            return False
+        try:
+            return not self.client_socket.recv(1, socket.MSG_PEEK)
+        except OSError:
+            return True
@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class TokenBucket:
+    """Allow `rate` events per second with bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def refill(self, now: float):
+        """Add the tokens earned since the last update"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def consume(self, tokens: float = 1.0) -> bool:
+        """Take tokens if available, return False if the event should be refused"""
+        with self.lock:
+            self.refill(time.monotonic())
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def is_full(self) -> bool:
+        """Check if the bucket has fully refilled (same as a new bucket)"""
+        with self.lock:
+            self.refill(time.monotonic())
+            return self.tokens >= self.burst
+
+
+class AdmissionController:
+    """Connection limits and overload detection for RPSServer"""
+
+    def __init__(self, max_connections: int = 1000,
+                 connect_rate: float = 5.0, connect_burst: float = 20.0,
+                 message_rate: float = 10.0, message_burst: float = 20.0,
+                 overload_fraction: float = 0.9):
+        self.max_connections = max_connections
+        self.connect_rate = connect_rate
+        self.connect_burst = connect_burst
+        self.message_rate = message_rate
+        self.message_burst = message_burst
+        # Above this share of max_connections no new rooms are created
+        self.overload_fraction = overload_fraction
+
+        self.connections = 0
+        # Least recently seen address first
+        self.address_buckets = OrderedDict()
+        self.max_tracked_addresses = 10000
+        self.lock = threading.Lock()
+
+    def admit(self, address: str) -> Optional[str]:
+        """Count a new connection, or return why it is rejected"""
+        with self.lock:
+            if self.connections >= self.max_connections:
+                return "Server is full, please try again later"
+
+            bucket = self.address_buckets.get(address)
+            if bucket is None:
+                if len(self.address_buckets) >= self.max_tracked_addresses:
+                    self.prune_addresses()
+                bucket = TokenBucket(self.connect_rate, self.connect_burst)
+                self.address_buckets[address] = bucket
+            else:
+                self.address_buckets.move_to_end(address)
+            if not bucket.consume():
+                return "Too many connections from your address, slow down"
+
+            self.connections += 1
+            return None
+
+    def prune_addresses(self):
+        """Make room for a new address (caller holds the lock)
+
+        Addresses whose bucket has refilled are forgotten first. If that
+        frees nothing, e.g. during a storm from many addresses, the least
+        recently seen ones are evicted so the table stays bounded.
+        """
+        for address in [a for a, b in self.address_buckets.items() if b.is_full()]:
+            del self.address_buckets[address]
+        while len(self.address_buckets) >= self.max_tracked_addresses:
+            self.address_buckets.popitem(last=False)
+
+    def release(self):
+        """Count a connection as closed"""
+        with self.lock:
+            self.connections = max(0, self.connections - 1)
+
+    @property
+    def overloaded(self) -> bool:
+        """Check if the server should stop starting new matches"""
+        return self.connections >= self.max_connections * self.overload_fraction
+
+    def message_bucket(self) -> TokenBucket:
+        """Create the message rate limiter for one connection"""
+        return TokenBucket(self.message_rate, self.message_burst)
@@ -3,14 +3,22 @@ import threading
 import json
 import sys
 import os
+import time
 import uuid
+from typing import Optional, Tuple
 
 # Add project root to path before importing setup_path
 _project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if _project_root not in sys.path:
     sys.path.insert(0, _project_root)
 
-from Database import GameDatabase
+from Database import GameDatabase, GameStorage
+from Bot import BOT_NAME, BotClient, PredictionEngine
+from RateLimit import AdmissionController
+from Protocol import MessageReader
+from Profiling import FunctionTimers, SamplingProfiler, TimedStorage
+from Admin import AdminServer, DEFAULT_ADMIN_SOCKET
+from Cluster import ClusterNode
 
 class Room:
     def __init__(self, room_id: str):
@@ -19,8 +27,12 @@ class Room:
         self.player_names = {}
         self.player_ids = {}
         self.choices = {}
+        # player_num -> stage timestamps of a traced choice
+        self.traces = {}
         self.lock = threading.Lock()
         self.game_ready = False
+        # Puts a bot in a seat emptied mid-game (see schedule_bot)
+        self.bot_timer = None
 
     def is_full(self):
         """Check if room has 2 players"""
@@ -56,16 +68,61 @@ class Room:
                 del self.player_ids[player_num]
             if player_num in self.choices:
                 del self.choices[player_num]
+            if player_num in self.traces:
+                del self.traces[player_num]
 
 class RPSServer:
-    def __init__(self, host: str = 'localhost', port: int = 5555):
+    def __init__(self, host: str = 'localhost', port: int = 5555,
+                 bot_wait: Optional[float] = 10.0,
+                 db: Optional[GameStorage] = None,
+                 admission: Optional[AdmissionController] = None,
+                 admin_socket: Optional[str] = None,
+                 coordinator: Optional[Tuple[str, int]] = None,
+                 advertise_host: Optional[str] = None):
         self.host = host
         self.port = port
         self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.rooms = {}
         self.client_to_room = {}
-        self.db = GameDatabase()
+        # Profiling: timers are off until enabled from the admin socket
+        self.timers = FunctionTimers()
+        self.profiler = SamplingProfiler()
+        self.handle_choice = self.timers.wrap('handle_choice', self.handle_choice)
+        self.determine_winner = self.timers.wrap('determine_winner', self.determine_winner)
+
+        # Any GameStorage works, e.g. MemoryDatabase to leave out disk I/O
+        self.db = TimedStorage(db if db is not None else GameDatabase(), self.timers)
         self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.stopped = threading.Event()
+        # Set while draining: no new matches or rounds, then shut down
+        self.draining = False
+
+        # Seconds a player waits alone before a bot takes the other seat
+        # (None disables the bot)
+        self.bot_wait = bot_wait
+        self.bot_engine = PredictionEngine()
+        self.bot_user_id = None
+        self.db.reserve_name(BOT_NAME)
+
+        # Connection caps, per-address and per-connection rate limits
+        self.admission = admission if admission is not None else AdmissionController()
+        # Consecutive rate-limited messages before a client is disconnected
+        self.max_dropped_messages = 50
+
+        # Local admin control socket (Unix socket path, None disables it)
+        self.admin_socket = admin_socket
+        self.admin = None
+
+        # Cluster mode: matchmaking happens on the coordinator and clients
+        # arrive with the room_id they were routed to
+        self.coordinator = coordinator
+        self.cluster_node = None
+        # Host the coordinator sends clients to, which differs from the bind
+        # host when listening on all interfaces or behind NAT
+        if advertise_host is None:
+            advertise_host = socket.gethostname() if host in ('', '0.0.0.0') else host
+        self.advertise_host = advertise_host
         
     def start(self):
         """Start the server and listen for connections"""
@@ -73,6 +130,18 @@ class RPSServer:
             self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             self.server_socket.bind((self.host, self.port))
             self.server_socket.listen()
+            # Pick up the real port when bound to port 0
+            self.port = self.server_socket.getsockname()[1]
+            if self.admin_socket:
+                self.admin = AdminServer(self, self.admin_socket)
+                self.admin.start()
+            if self.coordinator:
+                self.cluster_node = ClusterNode(
+                    f"{self.advertise_host}:{self.port}", self.advertise_host,
+                    self.port, self.coordinator
+                )
+                self.cluster_node.register()
+            self.ready.set()
             print(f"Server started on {self.host}:{self.port}")
             print("Waiting for players to connect...")
 
@@ -81,8 +150,41 @@ class RPSServer:
                     client_socket, address = self.server_socket.accept()
                     print(f"Client connected from {address}")
 
-                    # Find or create a room for this client
-                    room_id, player_num = self.assign_client_to_room(client_socket)
+                    # Messages are small and sent back to back (choice_received
+                    # then result), so don't let Nagle hold them back
+                    client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+                    if self.draining:
+                        self.reject_client(client_socket, "Server is restarting, please reconnect shortly")
+                        continue
+
+                    reason = self.admission.admit(address[0])
+                    if reason:
+                        self.reject_client(client_socket, reason)
+                        continue
+
+                    if self.coordinator:
+                        # The room comes with the register message
+                        client_thread = threading.Thread(
+                            target=self.handle_routed_client,
+                            args=(client_socket,)
+                        )
+                        client_thread.daemon = True
+                        client_thread.start()
+                        continue
+
+                    # Find or create a room for this client. When overloaded,
+                    # only pair with players already waiting so active matches
+                    # keep their capacity.
+                    assignment = self.assign_client_to_room(
+                        client_socket,
+                        allow_new_room=not self.admission.overloaded
+                    )
+                    if assignment is None:
+                        self.admission.release()
+                        self.reject_client(client_socket, "Server is busy, please try again later")
+                        continue
+                    room_id, player_num = assignment
 
                     print(f"Client assigned to room {room_id} as Player {player_num + 1}")
 
@@ -98,6 +200,9 @@ class RPSServer:
                     # Re-raise KeyboardInterrupt to be handled by outer try-except
                     if isinstance(e, KeyboardInterrupt):
                         raise
+                    # The server socket is closed on shutdown
+                    if self.stopped.is_set():
+                        break
                     print(f"Error accepting connection: {e}")
                     break
         except KeyboardInterrupt:
@@ -105,9 +210,44 @@ class RPSServer:
             self.shutdown()
             raise
 
-    def assign_client_to_room(self, client_socket):
-        """Assign a client to an available room or create a new one"""
+    def reject_client(self, client_socket: socket.socket, reason: str):
+        """Tell a client why it was refused and close the connection"""
+        print(f"Rejected connection: {reason}")
+        try:
+            rejected_msg = {
+                'type': 'rejected',
+                'message': reason
+            }
+            client_socket.send(json.dumps(rejected_msg).encode('utf-8'))
+        except OSError:
+            pass
+        finally:
+            client_socket.close()
+
+    def assign_client_to_room(self, client_socket, allow_new_room: bool = True,
+                              room_id: Optional[str] = None):
+        """Assign a client to an available room or create a new one
+
+        With a room_id (cluster mode) the client joins or creates that room.
+        Returns None if the server is draining, if that room is full, or if
+        no room has space and allow_new_room is False.
+        """
         with self.lock:
+            if self.draining:
+                return None
+
+            if room_id is not None:
+                room = self.rooms.get(room_id)
+                if room is None:
+                    room = Room(room_id)
+                    self.rooms[room_id] = room
+                    print(f"Created routed room {room_id}")
+                player_num = room.add_client(client_socket)
+                if player_num is None:
+                    return None
+                self.client_to_room[client_socket] = room_id
+                return room_id, player_num
+
             # Find an existing room with space
             for room_id, room in self.rooms.items():
                 if not room.is_full():
@@ -118,6 +258,9 @@ class RPSServer:
                             print(f"Room {room_id} is now full. Game can begin!")
                         return room_id, player_num
 
+            if not allow_new_room:
+                return None
+
             # No available room, create a new one
             room_id = str(uuid.uuid4())[:8]
             new_room = Room(room_id)
@@ -127,26 +270,59 @@ class RPSServer:
             print(f"Created new room {room_id}")
             return room_id, player_num
 
-    def handle_client(self, client_socket: socket.socket, room_id: str, player_num: int):
+    def handle_routed_client(self, client_socket: socket.socket):
+        """Read a routed client's register message and seat it in its room"""
+        reader = MessageReader(client_socket)
+        try:
+            message = reader.read()
+        except (ConnectionError, OSError, json.JSONDecodeError) as e:
+            print(f"Routed client disconnected before registering: {e}")
+            message = None
+
+        assignment = None
+        if message and message.get('type') == 'register' and message.get('room_id'):
+            assignment = self.assign_client_to_room(client_socket, room_id=message['room_id'])
+        if assignment is None:
+            self.admission.release()
+            self.reject_client(client_socket, "Could not join the room, please reconnect")
+            return
+
+        room_id, player_num = assignment
+        print(f"Client assigned to room {room_id} as Player {player_num + 1}")
+        self.handle_client(client_socket, room_id, player_num, reader, message)
+
+    def handle_client(self, client_socket: socket.socket, room_id: str, player_num: int,
+                      reader: Optional[MessageReader] = None,
+                      first_message: Optional[dict] = None):
         """Handle communication with a single client"""
         room = self.rooms.get(room_id)
         if not room:
+            self.admission.release()
             return
 
+        reader = reader or MessageReader(client_socket)
+        message_bucket = self.admission.message_bucket()
+        dropped = 0
+
         try:
-            # First, receive the player's name
-            data = client_socket.recv(1024).decode('utf-8')
-            if not data:
+            # First, receive the player's name (already read for routed clients)
+            message = first_message if first_message is not None else reader.read()
+            if message is None:
                 return
 
-            message = json.loads(data)
-
             if message['type'] == 'register':
                 player_name = message['name']
-                room.player_names[player_num] = player_name
 
                 # Add user to database
                 user_id = self.db.add_user(player_name)
+                if user_id is None:
+                    rejected_msg = {
+                        'type': 'rejected',
+                        'message': f"The name '{player_name}' is reserved, please pick another"
+                    }
+                    client_socket.send(json.dumps(rejected_msg).encode('utf-8'))
+                    return
+                room.player_names[player_num] = player_name
                 room.player_ids[player_num] = user_id
 
                 print(f"Room {room_id}: Player {player_num + 1} registered as: {player_name}")
@@ -161,11 +337,14 @@ class RPSServer:
                 client_socket.send(json.dumps(response).encode('utf-8'))
 
                 # Wait for both players to be ready
+                wait_start = time.monotonic()
                 while len(room.player_names) < 2:
                     # Check if client disconnected while waiting
-                    if room.clients[player_num] is None:
+                    if room.clients[player_num] is None or reader.peer_closed():
                         return
-                    import time
+                    if (self.bot_wait is not None and
+                            time.monotonic() - wait_start >= self.bot_wait):
+                        self.add_bot_to_room(room_id)
                     time.sleep(0.1)
 
                 # When both players are registered, notify BOTH players
@@ -174,15 +353,32 @@ class RPSServer:
 
             # Main game loop
             while True:
-                data = client_socket.recv(1024).decode('utf-8')
-                if not data:
+                message = reader.read()
+                if message is None:
                     # Client disconnected
                     break
 
-                message = json.loads(data)
+                # Drop messages over the rate limit, tell the client once
+                if not message_bucket.consume():
+                    dropped += 1
+                    if dropped >= self.max_dropped_messages:
+                        print(f"Room {room_id}: Client {player_num} kept flooding, disconnecting")
+                        break
+                    if dropped == 1:
+                        limited_msg = {
+                            'type': 'rate_limited',
+                            'message': 'Slow down! Some of your messages were ignored.'
+                        }
+                        client_socket.send(json.dumps(limited_msg).encode('utf-8'))
+                    continue
+                dropped = 0
 
                 if message['type'] == 'choice':
-                    self.handle_choice(room_id, player_num, message['choice'])
+                    trace = None
+                    if message.get('trace_id'):
+                        trace = {'server_recv': time.time()}
+                    self.handle_choice(room_id, player_num, message['choice'],
+                                       message.get('trace_id'), trace)
 
         except (ConnectionError, OSError, json.JSONDecodeError) as e:
             print(f"Room {room_id}: Client {player_num} disconnected: {e}")
@@ -190,12 +386,59 @@ class RPSServer:
             print(f"Room {room_id}: Error handling client {player_num}: {e}")
         finally:
             # Handle client disconnection
+            self.admission.release()
             self.handle_client_disconnect(room_id, player_num)
             try:
                 client_socket.close()
             except:
                 pass
     
+    def add_bot_to_room(self, room_id: str):
+        """Fill the empty seat of a room with a bot opponent"""
+        room = self.rooms.get(room_id)
+        if not room or room.is_full() or self.draining:
+            return
+        human_num = 0 if room.clients[0] is not None else 1
+        opponent_id = room.player_ids.get(human_num)
+        if opponent_id is None:
+            return
+
+        # Database reads happen before taking any lock, so matchmaking
+        # isn't held up while the player's history is loaded
+        if self.bot_user_id is None:
+            self.bot_user_id = self.db.add_user(BOT_NAME, reserved_ok=True)
+        self.bot_engine.warm(opponent_id, self.db.get_recent_choices(opponent_id))
+
+        with self.lock:
+            # The room may have changed while the history was loading
+            if self.rooms.get(room_id) is not room or room.is_full() or self.draining:
+                return
+
+            with room.lock:
+                if room.player_ids.get(human_num) != opponent_id:
+                    return
+                bot = BotClient(self.bot_engine, opponent_id)
+                bot_num = room.add_client(bot)
+                room.player_names[bot_num] = BOT_NAME
+                room.player_ids[bot_num] = self.bot_user_id
+                print(f"Room {room_id}: No opponent found, {BOT_NAME} joined as Player {bot_num + 1}")
+
+    def schedule_bot(self, room: Room):
+        """Seat a bot in a room's empty seat if no player takes it within bot_wait"""
+        if self.bot_wait is None:
+            return
+        if room.bot_timer:
+            room.bot_timer.cancel()
+        room.bot_timer = threading.Timer(self.bot_wait, self.fill_seat_with_bot,
+                                         args=(room.room_id,))
+        room.bot_timer.daemon = True
+        room.bot_timer.start()
+
+    def fill_seat_with_bot(self, room_id: str):
+        """Add a bot to a room whose game was interrupted and restart it"""
+        self.add_bot_to_room(room_id)
+        self.notify_both_players_ready(room_id)
+
     def notify_both_players_ready(self, room_id: str):
         """Notify both players in a room that the game is ready"""
         room = self.rooms.get(room_id)
@@ -285,33 +528,84 @@ class RPSServer:
 
             room.remove_client(player_num)
 
+            # A bot has no reason to stay once its opponent has left
+            if isinstance(room.clients[other_player_num], BotClient):
+                room.remove_client(other_player_num)
+
             # Reset game state
             room.choices.clear()
+            room.traces.clear()
             room.game_ready = False
 
             # Clean up empty rooms
             if room.is_empty():
                 print(f"Room {room_id} is now empty, removing it")
+                if room.bot_timer:
+                    room.bot_timer.cancel()
                 del self.rooms[room_id]
             else:
                 print(f"Room {room_id}: Waiting for a new player to replace Player {player_num + 1}...")
+                if self.coordinator:
+                    # Nobody else is routed to this room, so send the
+                    # remaining player back to be matched again
+                    self.return_to_coordinator(room_id, room.clients[other_player_num])
+                else:
+                    # The remaining player's handler is past its wait loop,
+                    # so the bot fallback has to be scheduled here
+                    self.schedule_bot(room)
     
-    def handle_choice(self, room_id: str, player_num: int, choice: str):
+    def return_to_coordinator(self, room_id: str, client_socket: socket.socket):
+        """Redirect a player whose opponent left back to the coordinator"""
+        redirect_msg = {
+            'type': 'redirect',
+            'host': self.coordinator[0],
+            'port': self.coordinator[1]
+        }
+        try:
+            client_socket.send(json.dumps(redirect_msg).encode('utf-8'))
+            print(f"Room {room_id}: Sent remaining player back to the coordinator")
+        except Exception as e:
+            print(f"Room {room_id}: Error redirecting remaining player: {e}")
+
+    def handle_choice(self, room_id: str, player_num: int, choice: str,
+                      trace_id: Optional[str] = None, trace: Optional[dict] = None):
         """Handle a player's choice and determine winner if both have chosen"""
         room = self.rooms.get(room_id)
         if not room:
             return
 
         with room.lock:
+            if trace_id is not None:
+                trace = trace or {}
+                trace['server_lock'] = time.time()
+                room.traces[player_num] = (trace_id, trace)
+
             # Check if both clients are still connected
             if room.clients[player_num] is None:
                 return
             if room.clients[1 - player_num] is None:
                 return
 
+            # While draining, rounds already under way finish but none start
+            if self.draining and not room.choices:
+                try:
+                    draining_msg = {
+                        'type': 'draining',
+                        'message': 'Server is restarting, no new rounds can start'
+                    }
+                    room.clients[player_num].send(json.dumps(draining_msg).encode('utf-8'))
+                except Exception as e:
+                    print(f"Room {room_id}: Error sending drain notice: {e}")
+                return
+
             room.choices[player_num] = choice
             print(f"Room {room_id}: Player {player_num + 1} chose: {choice}")
 
+            # A bot picks its throw once the human has committed theirs
+            opponent = room.clients[1 - player_num]
+            if isinstance(opponent, BotClient) and (1 - player_num) not in room.choices:
+                room.choices[1 - player_num] = opponent.choose()
+
             # Notify this player that their choice was received
             try:
                 response = {
@@ -333,6 +627,7 @@ class RPSServer:
         if not room:
             return
 
+        round_start = time.time()
         choice1 = room.choices[0]
         choice2 = room.choices[1]
 
@@ -357,12 +652,14 @@ class RPSServer:
             choice2,
             result
         )
+        db_record = time.time()
 
         # Get updated scores
         p1_wins, p2_wins, draws = self.db.get_score(
             room.player_ids[0],
             room.player_ids[1]
         )
+        db_score = time.time()
 
         # Send results to both players
         for i in range(2):
@@ -380,6 +677,16 @@ class RPSServer:
                 'opponent_score': p2_wins if i == 0 else p1_wins,
                 'draws': draws
             }
+            if i in room.traces:
+                trace_id, trace = room.traces[i]
+                trace.update({
+                    'round_start': round_start,
+                    'db_record': db_record,
+                    'db_score': db_score,
+                    'server_send': time.time()
+                })
+                result_msg['trace_id'] = trace_id
+                result_msg['trace'] = trace
             try:
                 room.clients[i].send(json.dumps(result_msg).encode('utf-8'))
             except Exception as e:
@@ -387,13 +694,73 @@ class RPSServer:
 
         # Clear choices for next round
         room.choices.clear()
+        room.traces.clear()
         print(f"Room {room_id}: Game result: {winner_text}")
         print(f"Room {room_id}: Score - {room.player_names[0]}: {p1_wins}, {room.player_names[1]}: {p2_wins}, Draws: {draws}")
     
+    def kick_player(self, room_id: str, player_num: int) -> bool:
+        """Disconnect a player; their handler thread cleans up the room"""
+        room = self.rooms.get(room_id)
+        if not room or not 0 <= player_num < len(room.clients):
+            return False
+        client = room.clients[player_num]
+        if client is None:
+            return False
+
+        if isinstance(client, BotClient):
+            # A bot has no handler thread, so run the disconnect path here
+            self.handle_client_disconnect(room_id, player_num)
+            return True
+
+        print(f"Room {room_id}: Kicking Player {player_num + 1}")
+        try:
+            kicked_msg = {
+                'type': 'kicked',
+                'message': 'You were disconnected by the server operator'
+            }
+            client.send(json.dumps(kicked_msg).encode('utf-8'))
+        except OSError:
+            pass
+        try:
+            # Wakes the handler's recv(), which then runs the disconnect path
+            client.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        return True
+
+    def drain(self, timeout: float = 30.0):
+        """Stop matchmaking, let in-flight rounds finish, flush and shut down"""
+        with self.lock:
+            if self.draining:
+                return
+            self.draining = True
+        print("Draining: no new players or rounds accepted")
+
+        # Stop the coordinator routing new rooms here
+        if self.cluster_node:
+            self.cluster_node.close()
+
+        # A round is in flight from the first choice until determine_winner
+        # has sent the results and cleared the choices
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not any(room.choices for room in list(self.rooms.values())):
+                break
+            time.sleep(0.05)
+        else:
+            print("Draining: timed out waiting for rounds to finish")
+
+        print("Draining: flushing database...")
+        self.db.flush()
+        self.shutdown()
+
     def shutdown(self):
         """Clean up resources and close all connections"""
+        self.stopped.set()
         print("Closing client connections...")
         for room in self.rooms.values():
+            if room.bot_timer:
+                room.bot_timer.cancel()
             for client in room.clients:
                 if client:
                     try:
@@ -401,6 +768,12 @@ class RPSServer:
                     except Exception as e:
                         print(f"Error closing client: {e}")
 
+        if self.admin:
+            self.admin.close()
+
+        if self.cluster_node:
+            self.cluster_node.close()
+
         print("Closing server socket...")
         try:
             self.server_socket.close()
@@ -410,14 +783,28 @@ class RPSServer:
         print("Server shutdown complete.")
 
 if __name__ == "__main__":
-    server = RPSServer()
+    # Optional arguments: port, coordinator host:port for cluster mode ('-'
+    # for none), host to bind and host to advertise to the coordinator
+    port = 5555
+    if len(sys.argv) > 1:
+        port = int(sys.argv[1])
+    coordinator = None
+    if len(sys.argv) > 2 and sys.argv[2] != '-':
+        coordinator_host, coordinator_port = sys.argv[2].rsplit(':', 1)
+        coordinator = (coordinator_host, int(coordinator_port))
+    host = sys.argv[3] if len(sys.argv) > 3 else 'localhost'
+    advertise_host = sys.argv[4] if len(sys.argv) > 4 else None
+
+    # One admin socket per node when several run on this host
+    admin_socket = DEFAULT_ADMIN_SOCKET if port == 5555 else f"rps_admin_{port}.sock"
+    server = RPSServer(host=host, port=port, admin_socket=admin_socket,
+                       coordinator=coordinator, advertise_host=advertise_host)
     try:
         server.start()
         
-        # Keep server running
+        # Keep server running until it is shut down (e.g. drained)
         try:
-            while True:
-                import time
+            while not server.stopped.is_set():
                 time.sleep(1)
         except KeyboardInterrupt:
             print("\nServer shutdown requested...")
@@ -430,7 +817,7 @@ if __name__ == "__main__":
         if e.errno == 48:  # Address already in use
             print(f"\nERROR: Port {server.port} is already in use!")
             print("Please kill the existing process or use a different port.")
-            print("You can find and kill the process with: lsof -ti:5555 | xargs kill -9")
+            print(f"You can find and kill the process with: lsof -ti:{server.port} | xargs kill -9")
         else:
             print(f"\nServer error: {e}")
         server.shutdown()
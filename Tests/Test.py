@@ -5,13 +5,19 @@ Run this to make sure the database is working correctly
 
 import sys
 import os
+import tempfile
+import sqlite3
+from datetime import datetime, timezone
 
-# Add project root to path before importing setup_path
+# Import server modules the way Server.py does, from the Server directory
 _project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-if _project_root not in sys.path:
-    sys.path.insert(0, _project_root)
+_server_dir = os.path.join(_project_root, 'Server')
+if _server_dir not in sys.path:
+    sys.path.insert(0, _server_dir)
 
-from Server.Database import GameDatabase
+from Database import GameDatabase, MemoryDatabase
+from Analytics import AnalyticsJob
+from Partitions import PartitionManager
 
 
 def test_database():
@@ -19,8 +25,9 @@ def test_database():
     print("Testing Rock Paper Scissors Database")
     print("=" * 50)
     
-    # Initialize database
-    db = GameDatabase("test_rps.db")
+    # Initialize a fresh database so counts don't carry over between runs
+    tmp = tempfile.TemporaryDirectory()
+    db = GameDatabase(os.path.join(tmp.name, "test_rps.db"))
     print("✓ Database initialized")
     
     # Add users
@@ -66,7 +73,211 @@ def test_database():
     print("\n" + "=" * 50)
     print("All tests passed! ✓")
     print("=" * 50)
-    print("\nYou can safely delete 'test_rps.db' if you want.")
+    tmp.cleanup()
+
+def test_analytics():
+    print("=" * 50)
+    print("Testing analytics precompute job")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db = GameDatabase(os.path.join(tmp, "analytics.db"))
+        alice_id = db.add_user("Alice")
+        bob_id = db.add_user("Bob")
+        
+        db.record_game(alice_id, bob_id, "rock", "paper", "player2_win")
+        db.record_game(alice_id, bob_id, "scissors", "rock", "player2_win")
+        db.record_game(alice_id, bob_id, "paper", "paper", "draw")
+        
+        # Small chunks so the carry-over between chunks is exercised
+        processed = AnalyticsJob(db.db_name, chunk_size=2).run()
+        assert processed == 3, f"Expected 3 games processed, got {processed}"
+        print("✓ Job processed all games")
+        
+        # Resuming picks up only new games
+        db.record_game(alice_id, bob_id, "rock", "scissors", "player1_win")
+        processed = AnalyticsJob(db.db_name, chunk_size=2).run()
+        assert processed == 1, f"Expected 1 new game processed, got {processed}"
+        print("✓ Job resumes from last processed game")
+        
+        freq = db.get_choice_frequency(alice_id)
+        assert freq == {"rock": 2, "scissors": 1, "paper": 1}, f"Unexpected frequency {freq}"
+        print(f"✓ Choice frequency: {freq}")
+        
+        after_loss = db.get_transitions(alice_id, after='loss')
+        assert after_loss == {"rock": {"scissors": 1}, "scissors": {"paper": 1}}, \
+            f"Unexpected transitions {after_loss}"
+        print(f"✓ Transitions after a loss: {after_loss}")
+        
+        assert db.get_player_record(alice_id) == (1, 2, 1)
+        assert db.get_player_record(bob_id) == (2, 1, 1)
+        assert db.get_win_rate(alice_id) == 0.25
+        print("✓ Win/loss records and win rate correct")
+
+def test_memory_database():
+    print("=" * 50)
+    print("Testing in-memory storage")
+    print("=" * 50)
+    
+    db = MemoryDatabase()
+    alice_id = db.add_user("Alice")
+    bob_id = db.add_user("Bob")
+    assert db.add_user("Alice") == alice_id, "User IDs should match for same user"
+    print("✓ Duplicate user handling works")
+    
+    db.record_game(alice_id, bob_id, "rock", "scissors", "player1_win")
+    db.record_game(bob_id, alice_id, "rock", "scissors", "player1_win")
+    db.record_game(alice_id, bob_id, "paper", "rock", "player1_win")
+    db.record_game(alice_id, bob_id, "scissors", "scissors", "draw")
+    
+    # Scores are the same whichever way round the players are passed
+    assert db.get_score(alice_id, bob_id) == (2, 1, 1)
+    assert db.get_score(bob_id, alice_id) == (1, 2, 1)
+    print("✓ Score calculation correct!")
+    
+    assert db.get_recent_choices(alice_id, 2) == ["paper", "scissors"]
+    assert db.get_user_name(bob_id) == "Bob"
+    print("✓ Recent choices and user name retrieval work")
+
+def test_user_cache():
+    print("=" * 50)
+    print("Testing cached user lookup")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, "users.db")
+        db = GameDatabase(db_name, user_cache_size=2)
+        ids = [db.add_user(name) for name in ("Alice", "Bob", "Carol")]
+        assert len(db.user_cache.entries) == 2, "Cache should be bounded"
+        print("✓ Cache size is bounded")
+        
+        # A new instance warms its cache with the newest users
+        warmed = GameDatabase(db_name, user_cache_size=2)
+        assert list(warmed.user_cache.entries) == ["Bob", "Carol"]
+        print("✓ Cache warmed at startup")
+        
+        # Misses fall back to the UPSERT and return the existing ID
+        uncached = GameDatabase(db_name, user_cache_size=0)
+        assert [uncached.add_user(name) for name in ("Alice", "Bob", "Carol")] == ids
+        assert uncached.add_user("Dave") not in ids
+        print("✓ Uncached lookups return existing IDs")
+
+def test_partitions():
+    print("=" * 50)
+    print("Testing partitioned games history")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db = GameDatabase(os.path.join(tmp, "partitions.db"))
+        alice_id = db.add_user("Alice")
+        bob_id = db.add_user("Bob")
+        
+        # Two closed months (with seats swapped in one game) and the live month
+        conn = sqlite3.connect(db.db_name)
+        conn.executemany("""
+            INSERT INTO games (player1_id, player2_id, player1_choice,
+                               player2_choice, game_status, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [
+            (alice_id, bob_id, "rock", "scissors", "player1_win", "2026-01-05 10:00:00"),
+            (bob_id, alice_id, "rock", "scissors", "player1_win", "2026-01-06 10:00:00"),
+            (alice_id, bob_id, "rock", "rock", "draw", "2026-02-01 10:00:00"),
+            (alice_id, bob_id, "paper", "rock", "player1_win", "2026-03-02 10:00:00"),
+        ])
+        conn.commit()
+        conn.close()
+        before = db.get_score(alice_id, bob_id)
+        assert before == (2, 1, 1), f"Expected (2, 1, 1), got {before}"
+        
+        now = datetime(2026, 3, 15, tzinfo=timezone.utc)
+        closed = PartitionManager(db.db_name, retention_months=1).compact(now)
+        assert closed == ["2026-01", "2026-02"], f"Unexpected months closed {closed}"
+        assert db.get_score(alice_id, bob_id) == before
+        assert db.get_score(bob_id, alice_id) == (1, 2, 1)
+        print("✓ Scores unchanged after compaction")
+        
+        # Archives keep id as their primary key, so id-range reads don't scan
+        conn = sqlite3.connect(db.db_name)
+        plan = conn.execute("""
+            EXPLAIN QUERY PLAN SELECT * FROM all_games WHERE id > ? AND id <= ?
+        """, (0, 10)).fetchall()
+        conn.close()
+        scans = [row[3] for row in plan if row[3].startswith("SCAN")]
+        assert scans == [], f"Unexpected full scans {scans}"
+        print("✓ Archived partitions are read by id range")
+        
+        # The bot's warm-up history reaches back into archived months
+        recent = db.get_recent_choices(alice_id)
+        assert recent == ["rock", "scissors", "rock", "paper"], f"Unexpected history {recent}"
+        assert db.get_recent_choices(alice_id, limit=2) == ["rock", "paper"]
+        print("✓ Recent choices include archived games")
+        
+        # Retention waits for analytics to process the raw games
+        dropped = PartitionManager(db.db_name, retention_months=1).apply_retention(now)
+        assert dropped == [], f"Dropped unprocessed months {dropped}"
+        print("✓ Retention keeps games analytics has not processed")
+        
+        # The analytics job sees the live and archived games
+        assert AnalyticsJob(db.db_name).run() == 4
+        print("✓ Analytics reads archived partitions")
+        
+        dropped = PartitionManager(db.db_name, retention_months=1).apply_retention(now)
+        assert dropped == ["2026-01"], f"Unexpected months dropped {dropped}"
+        assert db.get_score(alice_id, bob_id) == before
+        print("✓ Retention drops raw rows but keeps rollups")
+
+def test_partitions_without_archive():
+    print("=" * 50)
+    print("Testing compaction without archiving")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db = GameDatabase(os.path.join(tmp, "partitions.db"))
+        alice_id = db.add_user("Alice")
+        bob_id = db.add_user("Bob")
+        
+        conn = sqlite3.connect(db.db_name)
+        conn.executemany("""
+            INSERT INTO games (player1_id, player2_id, player1_choice,
+                               player2_choice, game_status, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [
+            (alice_id, bob_id, "rock", "scissors", "player1_win", "2026-01-05 10:00:00"),
+            (alice_id, bob_id, "rock", "paper", "player2_win", "2026-01-06 10:00:00"),
+            (alice_id, bob_id, "rock", "rock", "draw", "2026-01-07 10:00:00"),
+        ])
+        conn.commit()
+        conn.close()
+        
+        # Analytics has processed only the first two games
+        assert AnalyticsJob(db.db_name).run() == 3
+        conn = sqlite3.connect(db.db_name)
+        conn.execute("UPDATE analytics_progress SET last_game_id = ?", (2,))
+        conn.commit()
+        conn.close()
+        
+        now = datetime(2026, 3, 15, tzinfo=timezone.utc)
+        manager = PartitionManager(db.db_name, archive=False)
+        assert manager.compact(now) == ["2026-01"]
+        assert db.get_score(alice_id, bob_id) == (1, 1, 1)
+        
+        # The unprocessed game is still there for the job to pick up
+        conn = sqlite3.connect(db.db_name)
+        remaining = [row[0] for row in conn.execute("SELECT id FROM all_games")]
+        conn.close()
+        assert remaining == [3], f"Unexpected games left {remaining}"
+        print("✓ Games analytics has not processed are kept")
+        
+        # Once processed, the next compaction closes it too
+        AnalyticsJob(db.db_name).run()
+        assert manager.compact(now) == ["2026-01"]
+        assert db.get_score(alice_id, bob_id) == (1, 1, 1)
+        print("✓ Later compaction closes them once processed")
 
 if __name__ == "__main__":
-    test_database()
\ No newline at end of file
+    test_database()
+    test_analytics()
+    test_memory_database()
+    test_user_cache()
+    test_partitions()
+    test_partitions_without_archive()
@@ -0,0 +1,175 @@
+"""
+Shared fixtures for the test suite
+
+Benchmarks use the `benchmark` fixture, which follows pytest-benchmark's
+call style (benchmark(func, *args)) and compares the median time per call
+with Tests/benchmark_baselines.json. A benchmark fails when it is more than
+RPS_BENCH_TOLERANCE times (default 3) slower than its baseline. Run with
+RPS_BENCH_UPDATE=1 to record new baselines.
+"""
+
+import sys
+import os
+import json
+import statistics
+import threading
+import time
+
+import pytest
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for _subdir in ('Server', 'Client'):
+    _path = os.path.join(_project_root, _subdir)
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+from Server import RPSServer
+from Database import MemoryDatabase
+from RateLimit import AdmissionController
+from RPSConnection import BlockingConnection, decode_messages
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baselines.json')
+
+
+class FakeSocket:
+    """Stands in for a client socket and records what the server sends"""
+
+    def __init__(self):
+        self.sent = []
+        self.closed = False
+
+    def send(self, data: bytes):
+        if self.closed:
+            raise OSError("socket is closed")
+        self.sent.extend(decode_messages(data.decode('utf-8'))[0])
+        return len(data)
+
+    def close(self):
+        self.closed = True
+
+    def shutdown(self, how):
+        self.closed = True
+
+    def types(self):
+        return [message['type'] for message in self.sent]
+
+
+def unlimited_admission() -> AdmissionController:
+    """Admission control that never throttles test clients"""
+    return AdmissionController(connect_rate=1e9, connect_burst=1e9,
+                               message_rate=1e9, message_burst=1e9)
+
+
+@pytest.fixture
+def server():
+    """A server that is not listening, for calling its methods directly"""
+    return RPSServer(port=0, bot_wait=None, db=MemoryDatabase(),
+                     admission=unlimited_admission())
+
+
+def start_server(**kwargs) -> RPSServer:
+    """Start a server on a free loopback port in a background thread"""
+    kwargs.setdefault('bot_wait', None)
+    kwargs.setdefault('db', MemoryDatabase())
+    kwargs.setdefault('admission', unlimited_admission())
+    server = RPSServer(port=0, **kwargs)
+    thread = threading.Thread(target=server.start)
+    thread.daemon = True
+    thread.start()
+    assert server.ready.wait(5)
+    return server
+
+
+@pytest.fixture
+def running_server():
+    """A server listening on a free loopback port"""
+    server = start_server()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def connect(running_server):
+    """Factory for clients connected to running_server, closed afterwards"""
+    clients = []
+
+    def factory(name: str) -> BlockingConnection:
+        client = BlockingConnection(running_server.port, name, timeout=5)
+        clients.append(client)
+        return client
+
+    yield factory
+    for client in clients:
+        client.close()
+
+
+def wait_until(condition, timeout: float = 5.0) -> bool:
+    """Poll a condition until it holds or the timeout passes"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def load_baselines() -> dict:
+    if not os.path.exists(BASELINES_PATH):
+        return {}
+    with open(BASELINES_PATH) as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope='session')
+def baselines():
+    """Stored baselines, written back at the end of the session if updated"""
+    data = load_baselines()
+    state = {'data': data, 'dirty': False}
+    yield state
+    if state['dirty']:
+        with open(BASELINES_PATH, 'w') as f:
+            json.dump(state['data'], f, indent=2, sort_keys=True)
+            f.write('\n')
+
+
+@pytest.fixture
+def benchmark(request, baselines):
+    """Time a function and fail on a significant regression from its baseline"""
+    name = request.node.name
+    update = os.environ.get('RPS_BENCH_UPDATE') == '1'
+    tolerance = float(os.environ.get('RPS_BENCH_TOLERANCE', '3.0'))
+
+    def run(func, *args, **kwargs):
+        result = func(*args, **kwargs)
+
+        # Calibrate so one round takes at least ~5 ms
+        iterations = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(iterations):
+                func(*args, **kwargs)
+            if time.perf_counter() - start >= 0.005 or iterations >= 1_000_000:
+                break
+            iterations *= 2
+
+        samples = []
+        for _ in range(15):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                func(*args, **kwargs)
+            samples.append((time.perf_counter() - start) / iterations)
+        median_us = statistics.median(samples) * 1e6
+
+        baseline = baselines['data'].get(name)
+        if update or baseline is None:
+            baselines['data'][name] = {'median_us': round(median_us, 3)}
+            baselines['dirty'] = True
+        else:
+            limit = baseline['median_us'] * tolerance
+            assert median_us <= limit, (
+                f"{name} regressed: {median_us:.2f} us per call, "
+                f"baseline {baseline['median_us']:.2f} us (limit {limit:.2f} us)"
+            )
+        return result
+
+    return run
@@ -0,0 +1,111 @@
+import socket
+
+import pytest
+
+from Admin import AdminServer, send_command
+from conftest import wait_until
+
+
+@pytest.fixture
+def admin(server):
+    return AdminServer(server)
+
+
+@pytest.fixture
+def pair(server):
+    """Two registered players in one room, on real sockets"""
+    sockets = []
+    room_id = None
+    for name in ('Alice', 'Bob'):
+        ours, theirs = socket.socketpair()
+        sockets += [ours, theirs]
+        room_id, player_num = server.assign_client_to_room(ours)
+        server.rooms[room_id].player_names[player_num] = name
+        server.rooms[room_id].player_ids[player_num] = server.db.add_user(name)
+    yield room_id, sockets[1::2]
+    for sock in sockets:
+        sock.close()
+
+
+def test_execute_rejects_bad_input(admin):
+    assert admin.execute('') == {'ok': False, 'error': 'Empty command'}
+    assert 'Unknown command' in admin.execute('reboot')['error']
+    assert 'Bad arguments' in admin.execute('kick')['error']
+    assert 'Bad arguments' in admin.execute('kick room one')['error']
+    assert 'Bad arguments' in admin.execute('drain soon')['error']
+    assert 'Bad arguments' in admin.execute('timers sideways')['error']
+
+
+def test_help_lists_commands(admin):
+    reply = admin.execute('help')
+    assert reply['ok']
+    assert {'rooms', 'connections', 'kick', 'drain'} <= set(reply['commands'])
+
+
+def test_rooms_and_connections(admin, server, pair):
+    room_id, _ = pair
+    server.rooms[room_id].choices[0] = 'rock'
+
+    rooms = admin.execute('rooms')['rooms']
+    assert len(rooms) == 1
+    assert rooms[0]['room_id'] == room_id
+    assert rooms[0]['round_in_progress']
+    assert [(p['player'], p['name'], p['bot'], p['has_chosen'])
+            for p in rooms[0]['players']] == [
+        (1, 'Alice', False, True),
+        (2, 'Bob', False, False),
+    ]
+
+    reply = admin.execute('connections')
+    assert reply['rooms'] == 1
+    assert reply['waiting_players'] == 0
+    assert not reply['draining']
+
+
+def test_rooms_marks_bots(admin, server):
+    ours, theirs = socket.socketpair()
+    try:
+        room_id, _ = server.assign_client_to_room(ours)
+        server.rooms[room_id].player_names[0] = 'Alice'
+        server.rooms[room_id].player_ids[0] = server.db.add_user('Alice')
+        server.add_bot_to_room(room_id)
+        players = admin.execute('rooms')['rooms'][0]['players']
+        assert [p['bot'] for p in players] == [False, True]
+        assert admin.execute('connections')['waiting_players'] == 0
+    finally:
+        ours.close()
+        theirs.close()
+
+
+def test_kick(admin, pair):
+    room_id, remote = pair
+    assert admin.execute(f'kick {room_id} 2') == {
+        'ok': True, 'kicked': {'room_id': room_id, 'player': 2}
+    }
+    assert b'kicked' in remote[1].recv(1024)
+    assert not admin.execute(f'kick {room_id} 3')['ok']
+    assert not admin.execute('kick missing 1')['ok']
+
+
+def test_drain_runs_once(admin, server):
+    reply = admin.execute('drain 0.5')
+    assert reply == {'ok': True, 'draining': True, 'timeout': 0.5}
+    assert wait_until(server.stopped.is_set)
+    assert admin.execute('drain') == {'ok': False, 'error': 'Already draining'}
+
+
+def test_timers_command(admin, server):
+    assert admin.execute('timers on')['enabled']
+    assert server.timers.enabled
+    assert not admin.execute('timers off')['enabled']
+
+
+def test_commands_over_the_unix_socket(server, tmp_path):
+    path = str(tmp_path / 'admin.sock')
+    admin = AdminServer(server, path)
+    admin.start()
+    try:
+        assert send_command('connections', path)['connections'] == 0
+        assert not send_command('nope', path)['ok']
+    finally:
+        admin.close()
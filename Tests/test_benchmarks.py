@@ -0,0 +1,76 @@
+"""
+Microbenchmarks for the hot paths of a round
+
+Each benchmark is compared with Tests/benchmark_baselines.json, see conftest.py.
+"""
+
+import contextlib
+import io
+
+import pytest
+
+from Database import GameDatabase
+from RPSConnection import decode_messages, encode_message
+from conftest import FakeSocket
+
+RESULT_MSG = {
+    'type': 'result',
+    'your_choice': 'rock',
+    'opponent_choice': 'scissors',
+    'winner': 'Alice wins!',
+    'your_name': 'Alice',
+    'opponent_name': 'Bob',
+    'your_score': 12,
+    'opponent_score': 9,
+    'draws': 4
+}
+
+
+@pytest.fixture
+def game_db(tmp_path):
+    db = GameDatabase(str(tmp_path / 'bench.db'))
+    alice = db.add_user('Alice')
+    bob = db.add_user('Bob')
+    choices = ['rock', 'paper', 'scissors']
+    statuses = ['player1_win', 'player2_win', 'draw']
+    for i in range(500):
+        db.record_game(alice, bob, choices[i % 3], choices[(i + 1) % 3], statuses[i % 3])
+    return db, alice, bob
+
+
+def test_bench_determine_winner(server, benchmark):
+    sockets = [FakeSocket(), FakeSocket()]
+    room_id, _ = server.assign_client_to_room(sockets[0])
+    server.assign_client_to_room(sockets[1])
+    room = server.rooms[room_id]
+    room.player_names = {0: 'Alice', 1: 'Bob'}
+    room.player_ids = {0: server.db.add_user('Alice'), 1: server.db.add_user('Bob')}
+
+    def play_round():
+        room.choices = {0: 'rock', 1: 'scissors'}
+        server.determine_winner(room_id)
+        for client in sockets:
+            client.sent.clear()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        benchmark(play_round)
+    assert room.choices == {}
+
+
+def test_bench_get_score(game_db, benchmark):
+    db, alice, bob = game_db
+    wins, losses, draws = benchmark(db.get_score, alice, bob)
+    assert wins + losses + draws == 500
+
+
+def test_bench_encode_message(benchmark):
+    data = benchmark(encode_message, RESULT_MSG)
+    assert data.startswith(b'{')
+
+
+def test_bench_decode_messages(benchmark):
+    data = (encode_message({'type': 'choice_received', 'message': 'Waiting for opponent...'}) +
+            encode_message(RESULT_MSG)).decode('utf-8')
+    messages, remainder = benchmark(decode_messages, data)
+    assert len(messages) == 2
+    assert remainder == ""
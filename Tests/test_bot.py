@@ -0,0 +1,51 @@
+import sys
+import threading
+
+from Bot import CHOICES, PredictionEngine
+
+
+def test_engine_counters_a_predictable_player():
+    engine = PredictionEngine()
+    for _ in range(20):
+        engine.observe(1, 'rock')
+    assert engine.choose(1) == 'paper'
+
+
+def test_engine_evicts_least_recently_used_player():
+    engine = PredictionEngine(max_players=2)
+    engine.observe(1, 'rock')
+    engine.observe(2, 'rock')
+    engine.observe(1, 'paper')
+    engine.observe(3, 'rock')
+    assert list(engine.models) == [1, 3]
+
+
+def test_engine_is_safe_to_share_between_threads():
+    # Many rooms churning a small LRU: an eviction between get and
+    # move_to_end in another thread used to raise KeyError
+    engine = PredictionEngine(max_players=4)
+    errors = []
+
+    def room(offset):
+        try:
+            for i in range(3000):
+                player_id = (i + offset) % 12
+                engine.observe(player_id, CHOICES[i % 3], CHOICES[(i + 1) % 3])
+                engine.choose(player_id)
+                engine.warm(player_id + 100, ['rock', 'paper'])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=room, args=(n,)) for n in range(8)]
+    # Switch threads as often as possible to surface races
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert errors == []
+    assert len(engine.models) <= 4
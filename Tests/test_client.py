@@ -0,0 +1,64 @@
+import json
+from unittest import mock
+
+import RPSClient as client_module
+from RPSClient import RPSClient
+from Tracing import Tracer
+
+
+def test_client_builds_without_tkinter():
+    client = RPSClient()
+    assert client.root is None
+    assert client.events.drain() == []
+
+
+def test_kicked_ends_the_game_before_the_gui_catches_up():
+    client = RPSClient()
+    client.handle_server_message({'type': 'game_ready', 'opponent': 'Bob'})
+    assert client.game_ready
+
+    client.handle_server_message({'type': 'kicked', 'message': 'Bye'})
+    assert not client.game_ready
+    assert client.events.drain()[-1] == ('rejected', 'Bye')
+
+    # A click that arrives before the GUI has disabled the buttons is ignored
+    sent = []
+    client.connection.send_choice = lambda *args: sent.append(args)
+    client.make_choice('rock')
+    assert sent == []
+
+
+def test_rejected_ends_the_game():
+    client = RPSClient()
+    client.game_ready = True
+    client.handle_server_message({'type': 'rejected', 'message': 'Server is full'})
+    assert not client.game_ready
+
+
+def test_coalesced_results_still_finish_their_traces(tmp_path, monkeypatch):
+    monkeypatch.setattr(client_module, 'tk', mock.MagicMock())
+    path = tmp_path / 'trace.jsonl'
+    client = RPSClient(tracer=Tracer(str(path), sample_rate=1.0))
+    for widget in ('root', 'result_text', 'score_label', 'status_label',
+                   'rock_btn', 'paper_btn', 'scissors_btn'):
+        setattr(client, widget, mock.MagicMock())
+    client.game_ready = True
+    client.connection.send_choice = lambda choice, trace_id: trace_ids.append(trace_id)
+
+    # Two rounds resolve before the GUI gets a frame
+    trace_ids = []
+    for _ in range(2):
+        client.make_choice('rock')
+        client.handle_server_message({
+            'type': 'result', 'trace_id': trace_ids[-1], 'trace': {'server_recv': 1.0},
+            'your_name': 'Alice', 'your_choice': 'rock', 'opponent_name': 'Bob',
+            'opponent_choice': 'paper', 'winner': 'Bob wins!',
+            'your_score': 0, 'opponent_score': 1, 'draws': 0,
+        })
+    client.process_events()
+
+    traces = [json.loads(line) for line in path.read_text().splitlines()]
+    assert sorted(trace['trace_id'] for trace in traces) == sorted(trace_ids)
+    for trace in traces:
+        assert trace['client_click'] <= trace['client_send'] <= trace['client_recv']
+        assert 'client_render' in trace
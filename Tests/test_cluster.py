@@ -0,0 +1,206 @@
+import json
+import queue
+import socket
+import threading
+
+import pytest
+
+from Bot import BOT_NAME
+from Cluster import Coordinator, HashRing
+from Database import MemoryDatabase
+from RPSConnection import BlockingConnection, RPSConnection
+from Server import RPSServer
+from conftest import start_server, wait_until
+
+
+def test_ring_is_empty_until_a_node_joins():
+    ring = HashRing()
+    assert ring.get_node('room') is None
+    ring.add_node('a')
+    assert ring.get_node('room') == 'a'
+
+
+def test_adding_a_node_moves_about_one_nth_of_keys():
+    ring = HashRing()
+    for node in ('a', 'b', 'c', 'd'):
+        ring.add_node(node)
+    keys = [f"room{i}" for i in range(10000)]
+    before = {key: ring.get_node(key) for key in keys}
+
+    ring.add_node('e')
+    moved = [key for key in keys if ring.get_node(key) != before[key]]
+
+    # Only keys now owned by the new node move, roughly 1/5 of them
+    assert all(ring.get_node(key) == 'e' for key in moved)
+    assert 0.1 < len(moved) / len(keys) < 0.3
+
+    ring.remove_node('e')
+    assert {key: ring.get_node(key) for key in keys} == before
+
+
+def run_coordinator(solo_wait: float) -> Coordinator:
+    coordinator = Coordinator(port=0, solo_wait=solo_wait)
+    thread = threading.Thread(target=coordinator.start)
+    thread.daemon = True
+    thread.start()
+    assert coordinator.ready.wait(5)
+    return coordinator
+
+
+@pytest.fixture
+def coordinator():
+    coordinator = run_coordinator(solo_wait=0.2)
+    yield coordinator
+    coordinator.shutdown()
+
+
+def register_node(coordinator: Coordinator, node_id: str, port: int) -> socket.socket:
+    conn = socket.create_connection(('localhost', coordinator.port))
+    conn.send(json.dumps({'type': 'node_register', 'node_id': node_id,
+                          'host': 'localhost', 'port': port}).encode('utf-8'))
+    assert wait_until(lambda: node_id in coordinator.nodes)
+    return conn
+
+
+def test_coordinator_pairs_players_onto_one_node(coordinator):
+    node = register_node(coordinator, 'node1', 6001)
+    alice = BlockingConnection(coordinator.port, 'Alice', timeout=5)
+    bob = BlockingConnection(coordinator.port, 'Bob', timeout=5)
+    try:
+        alice_redirect = alice.wait_for('redirect')
+        bob_redirect = bob.wait_for('redirect')
+        assert alice_redirect == bob_redirect
+        assert (alice_redirect['host'], alice_redirect['port']) == ('localhost', 6001)
+    finally:
+        alice.close()
+        bob.close()
+        node.close()
+
+
+def test_unmatched_player_is_routed_alone_after_solo_wait(coordinator):
+    node = register_node(coordinator, 'node1', 6001)
+    alice = BlockingConnection(coordinator.port, 'Alice', timeout=5)
+    try:
+        assert alice.wait_for('redirect')['port'] == 6001
+        assert coordinator.waiting is None
+    finally:
+        alice.close()
+        node.close()
+
+
+def test_node_leaves_ring_when_its_connection_closes(coordinator):
+    node = register_node(coordinator, 'node1', 6001)
+    node.close()
+    assert wait_until(lambda: not coordinator.nodes)
+
+    alice = BlockingConnection(coordinator.port, 'Alice', timeout=5)
+    try:
+        assert 'No game servers' in alice.wait_for('rejected')['message']
+    finally:
+        alice.close()
+
+
+class Player:
+    """RPSConnection with its messages collected for the test"""
+
+    def __init__(self, port: int, name: str):
+        self.messages = queue.Queue()
+        self.connection = RPSConnection('localhost', port, on_message=self.messages.put)
+        self.connection.connect(name)
+
+    def wait_for(self, msg_type: str) -> dict:
+        while True:
+            message = self.messages.get(timeout=5)
+            if message['type'] == msg_type:
+                return message
+
+
+def test_redirected_players_play_and_survivor_is_rematched(coordinator):
+    node = start_server(bot_wait=0.1, coordinator=('localhost', coordinator.port))
+    assert wait_until(lambda: coordinator.nodes)
+    alice = Player(coordinator.port, 'Alice')
+    bob = Player(coordinator.port, 'Bob')
+    try:
+        # follow_redirect took both players to the node's room
+        assert alice.wait_for('game_ready')['opponent'] == 'Bob'
+        room_id = bob.wait_for('game_ready')['room_id']
+        assert room_id in node.rooms
+
+        bob.connection.close()
+        assert alice.wait_for('opponent_disconnected')
+
+        # Alice goes back to the coordinator, is routed alone after
+        # solo_wait and gets the node's bot in a new room
+        ready = alice.wait_for('game_ready')
+        assert ready['opponent'] == BOT_NAME
+        assert ready['room_id'] != room_id
+        assert wait_until(lambda: room_id not in node.rooms)
+    finally:
+        alice.connection.close()
+        bob.connection.close()
+        node.shutdown()
+
+
+def test_node_advertises_a_host_other_than_its_bind_host(coordinator):
+    node = start_server(host='127.0.0.1', advertise_host='node1.example',
+                        coordinator=('localhost', coordinator.port))
+    alice = BlockingConnection(coordinator.port, 'Alice', timeout=5)
+    try:
+        assert node.server_socket.getsockname()[0] == '127.0.0.1'
+        redirect = alice.wait_for('redirect')
+        assert (redirect['host'], redirect['port']) == ('node1.example', node.port)
+    finally:
+        alice.close()
+        node.shutdown()
+
+
+def test_node_bound_to_all_interfaces_advertises_its_hostname():
+    node = RPSServer(host='0.0.0.0', port=0, bot_wait=None, db=MemoryDatabase())
+    assert node.advertise_host == socket.gethostname()
+    node.server_socket.close()
+
+
+def test_player_who_hangs_up_while_waiting_is_forgotten():
+    coordinator = run_coordinator(solo_wait=30)
+    node = register_node(coordinator, 'node1', 6001)
+    alice = BlockingConnection(coordinator.port, 'Alice', timeout=5)
+    bob = carol = None
+    try:
+        assert wait_until(lambda: coordinator.waiting is not None)
+        alice.close()
+        # Noticed by polling, long before solo_wait runs out
+        assert wait_until(lambda: coordinator.waiting is None, timeout=2)
+
+        bob = BlockingConnection(coordinator.port, 'Bob', timeout=5)
+        carol = BlockingConnection(coordinator.port, 'Carol', timeout=5)
+        assert bob.wait_for('redirect') == carol.wait_for('redirect')
+    finally:
+        for player in (bob, carol):
+            if player:
+                player.close()
+        node.close()
+        coordinator.shutdown()
+
+
+def test_pairing_skips_a_waiting_player_who_hung_up():
+    coordinator = run_coordinator(solo_wait=30)
+    # Too slow to notice on its own before Bob arrives
+    coordinator.poll_interval = 30
+    node = register_node(coordinator, 'node1', 6001)
+    alice = BlockingConnection(coordinator.port, 'Alice', timeout=5)
+    bob = carol = None
+    try:
+        assert wait_until(lambda: coordinator.waiting is not None)
+        alice.close()
+
+        bob = BlockingConnection(coordinator.port, 'Bob', timeout=5)
+        assert wait_until(lambda: coordinator.waiting is not None and
+                          coordinator.waiting['name'] == 'Bob')
+        carol = BlockingConnection(coordinator.port, 'Carol', timeout=5)
+        assert bob.wait_for('redirect') == carol.wait_for('redirect')
+    finally:
+        for player in (bob, carol):
+            if player:
+                player.close()
+        node.close()
+        coordinator.shutdown()
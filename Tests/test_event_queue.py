@@ -0,0 +1,58 @@
+from EventQueue import ClientEventQueue, coalesce
+
+
+def test_empty_batch():
+    assert coalesce([]) == []
+
+
+def test_only_last_result_is_kept():
+    batch = [('result', 1), ('result', 2), ('result', 3)]
+    assert coalesce(batch) == [('result', 3)]
+
+
+def test_status_dropped_when_later_event_sets_status():
+    batch = [('status', 'Waiting for opponent...'), ('result', 'r1')]
+    assert coalesce(batch) == [('result', 'r1')]
+
+    batch = [('status', 'Slow down!'), ('opponent_disconnected', 'left')]
+    assert coalesce(batch) == [('opponent_disconnected', 'left')]
+
+
+def test_status_kept_when_it_comes_last():
+    batch = [('result', 'r1'), ('status', 'Waiting for opponent...')]
+    assert coalesce(batch) == batch
+
+
+def test_disconnect_and_game_ready_are_never_dropped():
+    batch = [
+        ('game_ready', 'g1'),
+        ('status', 'Waiting for opponent...'),
+        ('result', 'r1'),
+        ('opponent_disconnected', 'left'),
+        ('game_ready', 'g2'),
+        ('result', 'r2'),
+    ]
+    # Every game_ready and disconnect stays, in order, with the last result
+    assert coalesce(batch) == [
+        ('game_ready', 'g1'),
+        ('opponent_disconnected', 'left'),
+        ('game_ready', 'g2'),
+        ('result', 'r2'),
+    ]
+
+
+def test_drain_respects_max_batch():
+    events = ClientEventQueue(max_batch=2)
+    events.put('registered', 'a')
+    events.put('game_ready', 'b')
+    events.put('opponent_disconnected', 'c')
+    assert events.drain() == [('registered', 'a'), ('game_ready', 'b')]
+    assert events.drain() == [('opponent_disconnected', 'c')]
+    assert events.drain() == []
+
+
+def test_coalesce_reports_dropped_events():
+    batch = [('result', 1), ('status', 's'), ('result', 2), ('result', 3)]
+    dropped = []
+    assert coalesce(batch, dropped) == [('result', 3)]
+    assert dropped == [('result', 1), ('status', 's'), ('result', 2)]
@@ -0,0 +1,96 @@
+import threading
+
+from Database import MemoryDatabase
+from Profiling import FunctionTimers, SamplingProfiler, TimedStorage
+
+
+def test_timers_only_record_when_enabled():
+    timers = FunctionTimers()
+    double = timers.wrap('double', lambda x: x * 2)
+
+    assert double(2) == 4
+    assert timers.snapshot() == {}
+
+    timers.enabled = True
+    double(3)
+    double(4)
+    stats = timers.snapshot()['double']
+    assert stats['calls'] == 2
+    assert stats['max_ms'] <= stats['total_ms']
+    assert stats['mean_ms'] == stats['total_ms'] / 2
+
+    timers.reset()
+    assert timers.snapshot() == {}
+
+
+def test_timers_record_calls_that_raise():
+    timers = FunctionTimers(enabled=True)
+
+    def fail():
+        raise ValueError("boom")
+
+    wrapped = timers.wrap('fail', fail)
+    try:
+        wrapped()
+    except ValueError:
+        pass
+    assert timers.snapshot()['fail']['calls'] == 1
+    assert wrapped.__name__ == 'fail'
+
+
+def test_timed_storage_delegates_and_times():
+    timers = FunctionTimers(enabled=True)
+    storage = MemoryDatabase()
+    db = TimedStorage(storage, timers)
+
+    alice = db.add_user('Alice')
+    bob = db.add_user('Bob')
+    db.record_game(alice, bob, 'rock', 'scissors', 'player1_win')
+    assert db.get_score(alice, bob) == (1, 0, 0)
+    assert db.get_recent_choices(alice) == ['rock']
+    assert db.get_user_name(bob) == 'Bob'
+    # Anything outside the interface is passed through untimed
+    assert db.games is storage.games
+
+    # Reserved names are kept by the wrapped storage
+    db.reserve_name('Server')
+    assert storage.add_user('Server') is None
+
+    calls = {name: stats['calls'] for name, stats in timers.snapshot().items()}
+    assert calls == {
+        'db.add_user': 2,
+        'db.record_game': 1,
+        'db.get_score': 1,
+        'db.get_recent_choices': 1,
+        'db.get_user_name': 1,
+    }
+
+
+def test_sampling_profiler_writes_collapsed_stacks(tmp_path):
+    stop = threading.Event()
+
+    def busy_worker():
+        while not stop.is_set():
+            sum(range(1000))
+
+    worker = threading.Thread(target=busy_worker)
+    worker.start()
+    output = tmp_path / 'profile.folded'
+    profiler = SamplingProfiler(interval=0.001)
+    try:
+        assert profiler.start(0.2, str(output))
+        assert not profiler.start(0.2, str(output))
+        profiler.thread.join(5)
+    finally:
+        stop.set()
+        worker.join()
+
+    lines = output.read_text().splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(' ', 1)
+        assert int(count) > 0
+        # Root first, semicolon separated file:function frames
+        assert all(':' in frame for frame in stack.split(';'))
+    assert any('test_profiling.py:busy_worker' in line for line in lines)
+    assert not profiler.running
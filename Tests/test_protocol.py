@@ -0,0 +1,155 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+
+import pytest
+
+from Protocol import MessageReader
+from RPSConnection import RPSConnection, decode_messages, encode_message
+from conftest import wait_until
+
+
+def test_decode_messages_splits_back_to_back_messages():
+    data = (encode_message({'type': 'choice_received'}) +
+            encode_message({'type': 'result', 'winner': 'Bob wins!'})).decode('utf-8')
+    messages, remainder = decode_messages(data)
+    assert [m['type'] for m in messages] == ['choice_received', 'result']
+    assert remainder == ""
+
+
+def test_decode_messages_keeps_partial_message():
+    data = encode_message({'type': 'status', 'message': 'hello'}).decode('utf-8')
+    messages, remainder = decode_messages(data[:10])
+    assert messages == []
+    messages, remainder = decode_messages(remainder + data[10:])
+    assert messages == [{'type': 'status', 'message': 'hello'}]
+    assert remainder == ""
+
+
+def test_message_reader_handles_split_and_coalesced_messages():
+    left, right = socket.socketpair()
+    try:
+        reader = MessageReader(right)
+        data = encode_message({'type': 'register', 'name': 'Alice'}) + \
+            encode_message({'type': 'choice', 'choice': 'rock'})
+        left.sendall(data[:7])
+        left.sendall(data[7:])
+        left.close()
+
+        assert reader.read() == {'type': 'register', 'name': 'Alice'}
+        assert reader.read() == {'type': 'choice', 'choice': 'rock'}
+        assert reader.read() is None
+    finally:
+        right.close()
+
+
+def test_message_reader_rejects_oversized_garbage():
+    left, right = socket.socketpair()
+    try:
+        reader = MessageReader(right, max_buffer=64)
+        left.sendall(b'{"type": "' + b'x' * 200)
+        with pytest.raises(json.JSONDecodeError):
+            reader.read()
+    finally:
+        left.close()
+        right.close()
+
+
+def test_full_round_over_loopback(connect):
+    alice = connect('Alice')
+    assert alice.wait_for('registered')['player_num'] == 1
+    bob = connect('Bob')
+    assert bob.wait_for('registered')['player_num'] == 2
+
+    assert alice.wait_for('game_ready')['opponent'] == 'Bob'
+    assert bob.wait_for('game_ready')['opponent'] == 'Alice'
+
+    for round_num in (1, 2):
+        alice.send({'type': 'choice', 'choice': 'paper'})
+        bob.send({'type': 'choice', 'choice': 'rock'})
+        result = alice.wait_for('result')
+        assert result['winner'] == 'Alice wins!'
+        assert result['your_score'] == round_num
+        assert bob.wait_for('result')['opponent_score'] == round_num
+
+
+def test_disconnect_over_loopback(running_server, connect):
+    alice = connect('Alice')
+    bob = connect('Bob')
+    alice.wait_for('game_ready')
+    bob.wait_for('game_ready')
+
+    bob.close()
+    assert alice.wait_for('opponent_disconnected')
+    # The notice goes out just before the seat is freed
+    room = next(iter(running_server.rooms.values()))
+    assert wait_until(lambda: room.clients[1] is None)
+
+    # A new player takes Bob's seat and a new game starts
+    carol = connect('Carol')
+    assert carol.wait_for('registered')['player_num'] == 2
+    assert alice.wait_for('game_ready')['opponent'] == 'Carol'
+
+    alice.close()
+    carol.close()
+    assert wait_until(lambda: not running_server.rooms)
+
+
+def test_trace_round_trip_over_loopback(connect):
+    alice = connect('Alice')
+    bob = connect('Bob')
+    alice.wait_for('game_ready')
+    bob.wait_for('game_ready')
+
+    alice.send({'type': 'choice', 'choice': 'rock', 'trace_id': 't1'})
+    bob.send({'type': 'choice', 'choice': 'rock'})
+    result = alice.wait_for('result')
+    assert result['trace_id'] == 't1'
+    assert {'server_recv', 'server_lock', 'db_record', 'server_send'} <= set(result['trace'])
+    assert 'trace_id' not in bob.wait_for('result')
+
+
+def test_client_import_does_not_need_tkinter():
+    code = "import sys, RPSClient; sys.exit('tkinter' in sys.modules)"
+    client_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Client')
+    completed = subprocess.run([sys.executable, '-c', code], cwd=client_dir)
+    assert completed.returncode == 0
+
+
+def test_message_reader_detects_hang_up_without_consuming():
+    left, right = socket.socketpair()
+    try:
+        reader = MessageReader(right)
+        assert not reader.peer_closed()
+        left.sendall(encode_message({'type': 'choice', 'choice': 'rock'}))
+        assert not reader.peer_closed()
+        assert reader.read() == {'type': 'choice', 'choice': 'rock'}
+        left.close()
+        assert reader.peer_closed()
+    finally:
+        right.close()
+
+
+def test_waiting_player_hang_up_frees_room(running_server, connect):
+    alice = connect('Alice')
+    alice.wait_for('registered')
+    alice.close()
+    assert wait_until(lambda: not running_server.rooms)
+
+
+def test_close_is_silent(running_server, capsys):
+    disconnects = []
+    connection = RPSConnection('localhost', running_server.port,
+                               on_disconnect=lambda: disconnects.append(True))
+    connection.connect('Alice')
+    assert wait_until(lambda: running_server.rooms)
+    listener = connection.listen_thread
+
+    connection.close()
+    listener.join(5)
+
+    assert not listener.is_alive()
+    assert disconnects == []
+    assert "Error listening" not in capsys.readouterr().out
@@ -0,0 +1,115 @@
+import pytest
+
+import RateLimit
+from RateLimit import AdmissionController, TokenBucket
+from RPSConnection import BlockingConnection
+from conftest import start_server, wait_until
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(RateLimit.time, 'monotonic', clock)
+    return clock
+
+
+def test_bucket_allows_burst_then_refuses(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+    assert [bucket.consume() for _ in range(4)] == [True, True, True, False]
+
+
+def test_bucket_refills_at_rate_up_to_burst(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+    for _ in range(3):
+        bucket.consume()
+
+    clock.now += 0.5
+    assert bucket.consume()
+    assert not bucket.consume()
+
+    clock.now += 100
+    assert bucket.is_full()
+    assert bucket.tokens == 3
+
+
+def test_admit_and_release_count_connections(clock):
+    admission = AdmissionController(max_connections=2, connect_burst=10)
+    assert admission.admit('10.0.0.1') is None
+    assert admission.admit('10.0.0.2') is None
+    assert admission.connections == 2
+    assert 'full' in admission.admit('10.0.0.3')
+
+    admission.release()
+    assert admission.admit('10.0.0.3') is None
+    for _ in range(5):
+        admission.release()
+    assert admission.connections == 0
+
+
+def test_admit_limits_connect_rate_per_address(clock):
+    admission = AdmissionController(connect_rate=1, connect_burst=2)
+    assert admission.admit('10.0.0.1') is None
+    assert admission.admit('10.0.0.1') is None
+    assert 'slow down' in admission.admit('10.0.0.1')
+    # Other addresses have their own bucket
+    assert admission.admit('10.0.0.2') is None
+    clock.now += 1
+    assert admission.admit('10.0.0.1') is None
+
+
+def test_overloaded_threshold():
+    admission = AdmissionController(max_connections=10, overload_fraction=0.5)
+    admission.connections = 4
+    assert not admission.overloaded
+    admission.connections = 5
+    assert admission.overloaded
+
+
+def test_tracked_addresses_stay_bounded_in_a_storm(clock):
+    admission = AdmissionController(max_connections=10 ** 6)
+    admission.max_tracked_addresses = 100
+    for i in range(1000):
+        admission.admit(f'10.0.{i // 256}.{i % 256}')
+    assert len(admission.address_buckets) <= 100
+    # The most recent addresses are the ones kept
+    assert '10.0.3.231' in admission.address_buckets
+
+
+def test_recently_seen_address_is_not_evicted(clock):
+    admission = AdmissionController(max_connections=10 ** 6)
+    admission.max_tracked_addresses = 3
+    for address in ('a', 'b', 'c'):
+        admission.admit(address)
+    admission.admit('a')
+    admission.admit('d')
+    assert list(admission.address_buckets) == ['c', 'a', 'd']
+
+
+def test_overloaded_server_only_fills_waiting_rooms():
+    admission = AdmissionController(max_connections=4, overload_fraction=0.5,
+                                    connect_rate=1e9, connect_burst=1e9)
+    server = start_server(admission=admission)
+    clients = []
+    try:
+        for name in ('Alice', 'Bob'):
+            clients.append(BlockingConnection(server.port, name, timeout=5))
+            clients[-1].wait_for('registered')
+        assert admission.overloaded
+
+        # No waiting room, and no new rooms while overloaded
+        clients.append(BlockingConnection(server.port, 'Carol', timeout=5))
+        assert 'busy' in clients[-1].wait_for('rejected')['message']
+        assert wait_until(lambda: admission.connections == 2)
+        assert len(server.rooms) == 1
+    finally:
+        for client in clients:
+            client.close()
+        server.shutdown()
@@ -0,0 +1,44 @@
+from Server import Room
+
+
+def test_new_room_is_empty():
+    room = Room('abc')
+    assert room.is_empty()
+    assert not room.is_full()
+    assert room.get_available_slot() == 0
+
+
+def test_add_client_fills_slots_in_order():
+    room = Room('abc')
+    assert room.add_client('first') == 0
+    assert room.add_client('second') == 1
+    assert room.is_full()
+    assert room.add_client('third') is None
+    assert room.clients == ['first', 'second']
+
+
+def test_remove_client_clears_player_state():
+    room = Room('abc')
+    room.add_client('first')
+    room.add_client('second')
+    room.player_names = {0: 'Alice', 1: 'Bob'}
+    room.player_ids = {0: 1, 1: 2}
+    room.choices = {0: 'rock'}
+    room.traces = {0: ('t1', {})}
+
+    room.remove_client(0)
+
+    assert room.clients == [None, 'second']
+    assert room.player_names == {1: 'Bob'}
+    assert room.player_ids == {1: 2}
+    assert room.choices == {}
+    assert room.traces == {}
+    # The freed seat is offered to the next player
+    assert room.get_available_slot() == 0
+
+
+def test_remove_client_ignores_bad_slot():
+    room = Room('abc')
+    room.add_client('first')
+    room.remove_client(5)
+    assert room.clients == ['first', None]
@@ -0,0 +1,254 @@
+import threading
+import time
+
+from Bot import BOT_NAME, BotClient
+from Database import MemoryDatabase
+from Server import RPSServer
+from conftest import FakeSocket, wait_until
+
+
+def seat(server, name, room_id=None):
+    """Assign a fake client to a room and register it like handle_client does"""
+    client = FakeSocket()
+    room_id, player_num = server.assign_client_to_room(client, room_id=room_id)
+    room = server.rooms[room_id]
+    room.player_names[player_num] = name
+    room.player_ids[player_num] = server.db.add_user(name)
+    return client, room_id, player_num
+
+
+def test_players_are_paired_into_one_room(server):
+    _, room1, num1 = seat(server, 'Alice')
+    _, room2, num2 = seat(server, 'Bob')
+    assert room1 == room2
+    assert (num1, num2) == (0, 1)
+    assert server.rooms[room1].is_full()
+
+
+def test_third_player_gets_a_new_room(server):
+    _, room1, _ = seat(server, 'Alice')
+    seat(server, 'Bob')
+    _, room3, num3 = seat(server, 'Carol')
+    assert room3 != room1
+    assert num3 == 0
+    assert len(server.rooms) == 2
+
+
+def test_no_new_room_when_not_allowed(server):
+    assert server.assign_client_to_room(FakeSocket(), allow_new_room=False) is None
+    seat(server, 'Alice')
+    # Joining a waiting player is still allowed
+    assert server.assign_client_to_room(FakeSocket(), allow_new_room=False) is not None
+
+
+def test_no_assignment_while_draining(server):
+    server.draining = True
+    assert server.assign_client_to_room(FakeSocket()) is None
+
+
+def test_routed_clients_join_their_room(server):
+    _, room1, _ = seat(server, 'Alice', room_id='routed1')
+    _, room2, num2 = seat(server, 'Bob', room_id='routed1')
+    assert room1 == room2 == 'routed1'
+    assert num2 == 1
+    assert server.assign_client_to_room(FakeSocket(), room_id='routed1') is None
+
+
+def test_game_ready_sent_to_both_players(server):
+    alice, room_id, _ = seat(server, 'Alice')
+    bob, _, _ = seat(server, 'Bob')
+    server.notify_both_players_ready(room_id)
+    server.notify_both_players_ready(room_id)
+
+    assert alice.types() == ['game_ready']
+    assert bob.types() == ['game_ready']
+    assert alice.sent[0]['opponent'] == 'Bob'
+    assert bob.sent[0]['opponent'] == 'Alice'
+
+
+def test_round_results_and_scores(server):
+    alice, room_id, _ = seat(server, 'Alice')
+    bob, _, _ = seat(server, 'Bob')
+
+    server.handle_choice(room_id, 0, 'rock')
+    assert alice.types() == ['choice_received']
+    server.handle_choice(room_id, 1, 'scissors')
+
+    alice_result = alice.sent[-1]
+    bob_result = bob.sent[-1]
+    assert alice_result['type'] == bob_result['type'] == 'result'
+    assert alice_result['winner'] == 'Alice wins!'
+    assert (alice_result['your_score'], alice_result['opponent_score']) == (1, 0)
+    assert (bob_result['your_score'], bob_result['opponent_score']) == (0, 1)
+    assert bob_result['opponent_choice'] == 'rock'
+    assert server.rooms[room_id].choices == {}
+
+
+def test_determine_winner_outcomes(server):
+    alice, room_id, _ = seat(server, 'Alice')
+    seat(server, 'Bob')
+    room = server.rooms[room_id]
+
+    expected = [
+        ('rock', 'rock', "It's a draw!"),
+        ('paper', 'rock', 'Alice wins!'),
+        ('scissors', 'paper', 'Alice wins!'),
+        ('rock', 'paper', 'Bob wins!'),
+        ('paper', 'scissors', 'Bob wins!'),
+    ]
+    for choice1, choice2, winner in expected:
+        room.choices = {0: choice1, 1: choice2}
+        server.determine_winner(room_id)
+        assert alice.sent[-1]['winner'] == winner
+
+    assert alice.sent[-1]['your_score'] == 2
+    assert alice.sent[-1]['opponent_score'] == 2
+    assert alice.sent[-1]['draws'] == 1
+
+
+def test_choice_ignored_without_opponent(server):
+    alice, room_id, _ = seat(server, 'Alice')
+    server.handle_choice(room_id, 0, 'rock')
+    assert alice.sent == []
+    assert server.rooms[room_id].choices == {}
+
+
+def test_no_new_round_while_draining(server):
+    alice, room_id, _ = seat(server, 'Alice')
+    seat(server, 'Bob')
+    server.draining = True
+    server.handle_choice(room_id, 0, 'rock')
+    assert alice.types() == ['draining']
+
+
+def test_disconnect_notifies_opponent(server):
+    alice, room_id, _ = seat(server, 'Alice')
+    bob, _, _ = seat(server, 'Bob')
+    server.rooms[room_id].choices[1] = 'paper'
+
+    server.handle_client_disconnect(room_id, 0)
+
+    room = server.rooms[room_id]
+    assert alice.closed
+    assert bob.types() == ['opponent_disconnected']
+    assert room.clients[0] is None
+    assert room.choices == {}
+    assert not room.game_ready
+    # The next player takes the free seat
+    _, next_room, next_num = seat(server, 'Carol')
+    assert (next_room, next_num) == (room_id, 0)
+
+
+def test_empty_room_is_removed(server):
+    _, room_id, _ = seat(server, 'Alice')
+    server.handle_client_disconnect(room_id, 0)
+    assert room_id not in server.rooms
+
+
+def test_unregistered_disconnect_frees_slot(server):
+    client = FakeSocket()
+    room_id, player_num = server.assign_client_to_room(client)
+    server.handle_client_disconnect(room_id, player_num)
+    assert server.rooms[room_id].clients[player_num] is None
+
+
+def test_bot_fills_seat_and_leaves_with_player(server):
+    alice, room_id, _ = seat(server, 'Alice')
+    server.add_bot_to_room(room_id)
+    room = server.rooms[room_id]
+    assert isinstance(room.clients[1], BotClient)
+    assert room.player_names[1] == BOT_NAME
+
+    # The bot chooses as soon as the human does
+    server.handle_choice(room_id, 0, 'rock')
+    assert alice.types() == ['choice_received', 'result']
+
+    server.handle_client_disconnect(room_id, 0)
+    assert room_id not in server.rooms
+
+
+def test_kick_player(server):
+    alice, room_id, _ = seat(server, 'Alice')
+    assert server.kick_player(room_id, 0)
+    assert alice.types() == ['kicked']
+    assert alice.closed
+    assert not server.kick_player(room_id, 1)
+    assert not server.kick_player('missing', 0)
+
+
+def test_bot_fills_seat_emptied_mid_game(server):
+    server.bot_wait = 0.05
+    alice, room_id, _ = seat(server, 'Alice')
+    seat(server, 'Bob')
+    server.notify_both_players_ready(room_id)
+
+    server.handle_client_disconnect(room_id, 1)
+
+    room = server.rooms[room_id]
+    assert wait_until(lambda: isinstance(room.clients[1], BotClient))
+    assert wait_until(lambda: alice.types()[-1] == 'game_ready')
+    assert alice.sent[-1]['opponent'] == BOT_NAME
+
+
+def test_player_taking_emptied_seat_beats_the_bot(server):
+    server.bot_wait = 0.2
+    _, room_id, _ = seat(server, 'Alice')
+    seat(server, 'Bob')
+    server.handle_client_disconnect(room_id, 1)
+    seat(server, 'Carol')
+
+    time.sleep(0.3)
+    room = server.rooms[room_id]
+    assert room.player_names == {0: 'Alice', 1: 'Carol'}
+
+
+def test_bot_name_is_reserved(server):
+    assert server.db.add_user(BOT_NAME) is None
+    assert server.db.add_user(BOT_NAME, reserved_ok=True) is not None
+
+
+def test_bot_name_rejected_over_loopback(connect):
+    impostor = connect(BOT_NAME)
+    assert 'reserved' in impostor.wait_for('rejected')['message']
+
+
+def test_loading_bot_history_does_not_block_matchmaking():
+    loading = threading.Event()
+    release = threading.Event()
+
+    class SlowHistory(MemoryDatabase):
+        def get_recent_choices(self, user_id, limit=50):
+            loading.set()
+            release.wait(5)
+            return super().get_recent_choices(user_id, limit)
+
+    server = RPSServer(port=0, bot_wait=None, db=SlowHistory())
+    _, room_id, _ = seat(server, 'Alice')
+    bot_thread = threading.Thread(target=server.add_bot_to_room, args=(room_id,))
+    bot_thread.start()
+    try:
+        assert loading.wait(5)
+        # Another player can still be matched while the history loads
+        done = threading.Event()
+        threading.Thread(target=lambda: (seat(server, 'Carol', room_id='other'), done.set())).start()
+        assert done.wait(1)
+    finally:
+        release.set()
+        bot_thread.join(5)
+    assert isinstance(server.rooms[room_id].clients[1], BotClient)
+
+
+def test_bot_not_seated_if_player_took_the_seat_meanwhile():
+    class Hook(MemoryDatabase):
+        def get_recent_choices(self, user_id, limit=50):
+            # Seat Bob from another thread, as the accept loop would
+            joining = threading.Thread(target=seat, args=(server, 'Bob'))
+            joining.daemon = True
+            joining.start()
+            joining.join(1)
+            return super().get_recent_choices(user_id, limit)
+
+    server = RPSServer(port=0, bot_wait=None, db=Hook())
+    _, room_id, _ = seat(server, 'Alice')
+    server.add_bot_to_room(room_id)
+    assert server.rooms[room_id].player_names == {0: 'Alice', 1: 'Bob'}